@@ -1,35 +1,60 @@
 
 import models, torch, copy
+class ClientStateManager(object):
+
+	def __init__(self, conf):
+	
+		self.conf = conf
+		
+		# 同一进程内的所有客户端共用一个工作模型，训练前由全局模型覆盖其参数
+		self.working_model = None
+		
+		# 每个客户端只保存轻量的优化器状态
+		self.optimizer_states = {}
+		
+	def get_working_model(self):
+		if self.working_model is None:
+			self.working_model = models.get_model(self.conf["model_name"], pretrained=False)
+		return self.working_model
+		
+	def get_optimizer(self, client_id, model):
+		optimizer = torch.optim.SGD(model.parameters(), lr=self.conf['lr'],
+									momentum=self.conf['momentum'])
+		if self.conf.get("keep_optimizer_state", False) and client_id in self.optimizer_states:
+			optimizer.load_state_dict(self.optimizer_states[client_id])
+		return optimizer
+		
+	def save_optimizer(self, client_id, optimizer):
+		if self.conf.get("keep_optimizer_state", False):
+			self.optimizer_states[client_id] = copy.deepcopy(optimizer.state_dict())
+		
+
 class Client(object):
 
-	def __init__(self, conf, model, train_dataset, id = -1):
+	def __init__(self, conf, model, train_dataset, id = -1, state_manager = None):
 		
 		self.conf = conf
 		
-		self.local_model = models.get_model(self.conf["model_name"]) 
+		self.state_manager = state_manager if state_manager is not None else ClientStateManager(conf)
 		
 		self.client_id = id
 		
 		self.train_dataset = train_dataset
 		
-		all_range = list(range(len(self.train_dataset)))
 		data_len = int(len(self.train_dataset) / self.conf['no_models'])
-		train_indices = all_range[id * data_len: (id + 1) * data_len]
+		self.train_indices = range(len(self.train_dataset))[id * data_len: (id + 1) * data_len]
 
 		self.train_loader = torch.utils.data.DataLoader(self.train_dataset, batch_size=conf["batch_size"], 
-									sampler=torch.utils.data.sampler.SubsetRandomSampler(train_indices))
+									sampler=torch.utils.data.sampler.SubsetRandomSampler(self.train_indices))
 									
 		
 	def local_train(self, model):
 
-		for name, param in model.state_dict().items():
-			self.local_model.state_dict()[name].copy_(param.clone())
+		local_model = self.state_manager.get_working_model()
+		local_model.load_state_dict(model.state_dict())
 	
-		#print(id(model))
-		optimizer = torch.optim.SGD(self.local_model.parameters(), lr=self.conf['lr'],
-									momentum=self.conf['momentum'])
-		#print(id(self.local_model))
-		self.local_model.train()
+		optimizer = self.state_manager.get_optimizer(self.client_id, local_model)
+		local_model.train()
 		for e in range(self.conf["local_epochs"]):
 			
 			for batch_id, batch in enumerate(self.train_loader):
@@ -40,14 +65,15 @@ class Client(object):
 					target = target.cuda()
 			
 				optimizer.zero_grad()
-				output = self.local_model(data)
+				output = local_model(data)
 				loss = torch.nn.functional.cross_entropy(output, target)
 				loss.backward()
 			
 				optimizer.step()
 			print("Epoch %d done." % e)	
+		self.state_manager.save_optimizer(self.client_id, optimizer)
 		diff = dict()
-		for name, data in self.local_model.state_dict().items():
+		for name, data in local_model.state_dict().items():
 			diff[name] = (data - model.state_dict()[name])
 			#print(diff[name])
 			
@@ -0,0 +1,100 @@
+
+import os
+import torch
+import torch.multiprocessing as mp
+
+
+def client_seed(conf, round_id, client_id):
+	# 每个(轮次, 客户端)使用固定的随机种子，使结果与执行顺序、进程分配无关
+	if "seed" not in conf:
+		return None
+	return conf["seed"] + round_id * conf["no_models"] + client_id
+
+
+def run_local_train(client, model, seed):
+	if seed is not None:
+		torch.manual_seed(seed)
+	return client.local_train(model)
+
+
+class SerialExecutor(object):
+
+	def __init__(self, conf, clients):
+
+		self.conf = conf
+
+		self.clients = clients
+
+		if conf.get("threads", 0):
+			torch.set_num_threads(conf["threads"])
+
+	def run_round(self, model, candidates, round_id):
+		for c in candidates:
+			yield run_local_train(c, model, client_seed(self.conf, round_id, c.client_id))
+
+	def close(self):
+		pass
+
+
+_worker_clients = {}
+
+
+def _init_worker(clients, num_threads):
+	global _worker_clients
+	_worker_clients = {c.client_id: c for c in clients}
+	torch.set_num_threads(num_threads)
+
+
+def _worker_train(args):
+	client_id, model, seed, optimizer_state = args
+	client = _worker_clients[client_id]
+	# 客户端每轮可能被分配到不同的进程，优化器状态随任务一起传递
+	states = client.state_manager.optimizer_states
+	if optimizer_state is not None:
+		states[client_id] = optimizer_state
+	diff = run_local_train(client, model, seed)
+	return diff, states.pop(client_id, None)
+
+
+class ProcessPoolExecutor(object):
+
+	def __init__(self, conf, clients):
+
+		self.conf = conf
+
+		self.clients = clients
+
+		processes = min(conf.get("workers", 0) or os.cpu_count(), conf["k"])
+
+		# 每个进程分得的计算线程数，避免多进程同时抢占全部核心
+		num_threads = conf.get("threads", 0) or max(1, os.cpu_count() // processes)
+
+		# CUDA 不能在 fork 出的子进程中重新初始化
+		ctx = mp.get_context("spawn" if torch.cuda.is_available() else "fork")
+		self.pool = ctx.Pool(processes, initializer=_init_worker, initargs=(clients, num_threads))
+
+	def run_round(self, model, candidates, round_id):
+		tasks = [(c.client_id, model, client_seed(self.conf, round_id, c.client_id),
+				c.state_manager.optimizer_states.get(c.client_id)) for c in candidates]
+		# imap 按提交顺序返回结果，保证累加顺序与串行执行一致
+		for c, (diff, optimizer_state) in zip(candidates, self.pool.imap(_worker_train, tasks)):
+			if optimizer_state is not None:
+				c.state_manager.optimizer_states[c.client_id] = optimizer_state
+			yield diff
+
+	def close(self):
+		self.pool.close()
+		self.pool.join()
+
+
+EXECUTORS = {
+	"serial": SerialExecutor,
+	"process": ProcessPoolExecutor,
+}
+
+
+def get_executor(conf, clients):
+	name = conf.get("executor", "serial")
+	if name not in EXECUTORS:
+		raise ValueError("Unknown executor: %s" % name)
+	return EXECUTORS[name](conf, clients)
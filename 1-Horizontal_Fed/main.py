@@ -6,6 +6,7 @@ import torch, random
 
 from server import *
 from client import *
+from executor import get_executor
 import models, datasets
 
 	
@@ -20,14 +21,20 @@ if __name__ == '__main__':
 	with open(args.conf, 'r') as f:
 		conf = json.load(f)	
 	
+	if "seed" in conf:
+		random.seed(conf["seed"])
+		torch.manual_seed(conf["seed"])
 	
 	train_datasets, eval_datasets = datasets.get_dataset("./data/", conf["type"])
 	
 	server = Server(conf, eval_datasets)
 	clients = []
 	
+	state_manager = ClientStateManager(conf)
 	for c in range(conf["no_models"]):
-		clients.append(Client(conf, server.global_model, train_datasets, c))
+		clients.append(Client(conf, server.global_model, train_datasets, c, state_manager))
+	
+	executor = get_executor(conf, clients)
 		
 	print("\n\n")
 	for e in range(conf["global_epochs"]):
@@ -39,8 +46,7 @@ if __name__ == '__main__':
 		for name, params in server.global_model.state_dict().items():
 			weight_accumulator[name] = torch.zeros_like(params)
 		
-		for c in candidates:
-			diff = c.local_train(server.global_model)
+		for diff in executor.run_round(server.global_model, candidates, e):
 			
 			for name, params in server.global_model.state_dict().items():
 				weight_accumulator[name].add_(diff[name])
@@ -51,6 +57,8 @@ if __name__ == '__main__':
 		acc, loss = server.model_eval()
 		
 		print("Epoch %d, acc: %f, loss: %f\n" % (e, acc, loss))
+	
+	executor.close()
 				
 			
 		
@@ -0,0 +1,53 @@
+import argparse
+import time
+import numpy as np
+from phe import paillier
+from paillier_backend import PaillierBackend
+from key_manager import PaillierKeyManager, ObfuscatorPool
+
+
+## 对比每轮重新生成密钥与会话级密钥+预计算混淆因子的每轮延迟（生成密钥并加密一个长度为n的向量）
+def per_iteration(step, n_iter):
+    latencies = []
+    for _ in range(n_iter):
+        start = time.perf_counter()
+        step()
+        latencies.append(time.perf_counter() - start)
+    return np.asarray(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Paillier key manager benchmark')
+    parser.add_argument('--n', type=int, default=426, help='vector length encrypted per iteration')
+    parser.add_argument('--n_iter', type=int, default=10, help='number of iterations')
+    parser.add_argument('--pool_size', type=int, default=2048, help='obfuscator pool size')
+    args = parser.parse_args()
+
+    u = np.random.randn(args.n)
+    backend = PaillierBackend(n_jobs=1)
+
+    def baseline_step():
+        public_key, private_key = paillier.generate_paillier_keypair()
+        backend.encrypt(public_key, u)
+
+    manager = PaillierKeyManager()
+    public_key, _ = manager.get_keypair()
+    obfuscators = ObfuscatorPool(public_key, size=args.pool_size)
+
+    def managed_step():
+        public_key, private_key = manager.get_keypair()
+        backend.encrypt(public_key, u, obfuscators)
+
+    baseline = per_iteration(baseline_step, args.n_iter)
+    ## 给后台进程留出填充混淆因子池的时间，对应实际训练中其他步骤的耗时
+    time.sleep(1)
+    managed = per_iteration(managed_step, args.n_iter)
+    print("n=%d n_iter=%d" % (args.n, args.n_iter))
+    print("per-iteration keygen:  mean %.1f ms, p50 %.1f ms" % (baseline.mean(), np.median(baseline)))
+    print("session key + pool:    mean %.1f ms, p50 %.1f ms" % (managed.mean(), np.median(managed)))
+    obfuscators.close()
+    backend.close()
+
+
+if __name__ == "__main__":
+    main()
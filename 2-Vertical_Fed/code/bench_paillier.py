@@ -0,0 +1,51 @@
+import argparse
+import time
+import numpy as np
+from phe import paillier
+from paillier_backend import PaillierBackend
+
+
+## 对比逐元素列表推导与PaillierBackend的加密、解密、密文点积吞吐量（ops/sec）
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def report(name, n_ops, baseline_time, backend_time):
+    print("%-8s baseline: %10.1f ops/sec   backend: %10.1f ops/sec   speedup: %.2fx" % (
+        name, n_ops / baseline_time, n_ops / backend_time, baseline_time / backend_time))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Paillier backend benchmark')
+    parser.add_argument('--n', type=int, default=426, help='vector length (number of samples)')
+    parser.add_argument('--d', type=int, default=20, help='number of features for the dot product')
+    parser.add_argument('--n_jobs', type=int, default=None, help='worker processes, default all cores')
+    args = parser.parse_args()
+
+    public_key, private_key = paillier.generate_paillier_keypair()
+    u = np.random.randn(args.n)
+    X = np.random.randn(args.n, args.d)
+    backend = PaillierBackend(n_jobs=args.n_jobs)
+    print("n=%d d=%d n_jobs=%d" % (args.n, args.d, backend.n_jobs))
+
+    encrypted, t_base = timed(lambda: np.asarray([public_key.encrypt(x) for x in u]))
+    _, t_backend = timed(lambda: backend.encrypt(public_key, u))
+    report("encrypt", args.n, t_base, t_backend)
+
+    dot_base, t_base = timed(lambda: X.T.dot(encrypted))
+    dot_backend, t_backend = timed(lambda: backend.dot(X.T, encrypted))
+    report("dot", args.n * args.d, t_base, t_backend)
+
+    decrypted, t_base = timed(lambda: np.asarray([private_key.decrypt(x) for x in encrypted]))
+    decrypted_backend, t_backend = timed(lambda: backend.decrypt(private_key, encrypted))
+    report("decrypt", args.n, t_base, t_backend)
+
+    assert np.allclose(decrypted, decrypted_backend)
+    assert np.allclose(backend.decrypt(private_key, dot_backend), X.T.dot(u))
+    backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import collections
+import multiprocessing
+from phe import paillier
+from phe.util import powmod
+
+
+def _make_obfuscators(public_key, count):
+    return [powmod(public_key.get_random_lt_n(), public_key.n, public_key.nsquare) for _ in range(count)]
+
+
+class ObfuscatorPool:
+    """
+    Pool of precomputed obfuscation factors r^n mod n^2 for one public key, refilled by a background process.
+    """
+
+    def __init__(self, public_key, size=1024, batch_size=128, processes=1):
+        """
+        :param public_key: the Paillier public key the factors belong to
+        :param size: number of factors kept ready (or in flight)
+        :param batch_size: number of factors computed per background task
+        :param processes: number of background processes
+        """
+        self.public_key = public_key
+        self.size = size
+        self.batch_size = batch_size
+        self.factors = collections.deque()
+        self.pending = collections.deque()
+        self.pool = multiprocessing.Pool(processes)
+        self._refill()
+
+    def _collect(self, wait=False):
+        while self.pending and (wait or self.pending[0].ready()):
+            self.factors.extend(self.pending.popleft().get())
+            wait = False
+
+    def _refill(self):
+        while len(self.factors) + len(self.pending) * self.batch_size < self.size:
+            self.pending.append(self.pool.apply_async(_make_obfuscators, (self.public_key, self.batch_size)))
+
+    def take(self, count):
+        """
+        Take count factors, waiting for the background process first and computing inline only if the pool runs dry.
+        """
+        self._collect()
+        while len(self.factors) < count and self.pending:
+            self._collect(wait=True)
+        if len(self.factors) < count:
+            self.factors.extend(_make_obfuscators(self.public_key, count - len(self.factors)))
+        factors = [self.factors.popleft() for _ in range(count)]
+        self._refill()
+        return factors
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+
+class PaillierKeyManager:
+    """
+    Generate the Paillier keypair once per session and rotate it every rotate_every iterations.
+    """
+
+    def __init__(self, n_length=paillier.DEFAULT_KEYSIZE, rotate_every=0):
+        """
+        :param n_length: key length in bits
+        :param rotate_every: number of iterations a keypair is used for, 0 to keep one key for the whole session
+        """
+        self.n_length = n_length
+        self.rotate_every = rotate_every
+        self.public_key = None
+        self.private_key = None
+        self.n_used = 0
+
+    def get_keypair(self):
+        """
+        Return the keypair for the current iteration, generating a new one when due.
+        """
+        if self.public_key is None or (self.rotate_every > 0 and self.n_used >= self.rotate_every):
+            self.public_key, self.private_key = paillier.generate_paillier_keypair(n_length=self.n_length)
+            self.n_used = 0
+        self.n_used += 1
+        return self.public_key, self.private_key
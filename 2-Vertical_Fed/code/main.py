@@ -1,6 +1,6 @@
 import math
 import numpy as np
-# from phe import paillier
+from phe import paillier
 import pandas as pd
 from sklearn import datasets
 from sklearn.datasets import load_diabetes
@@ -8,16 +8,22 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.datasets import load_breast_cancer
 from sklearn.model_selection import train_test_split
 from sklearn.utils import shuffle
+from paillier_backend import PaillierBackend
+from key_manager import PaillierKeyManager, ObfuscatorPool
 
 
 class Client:
-    def __init__(self, config):
+    def __init__(self, config, crypto=None):
         ## 模型参数
         self.config = config
+        ## 同态加密后端，对整个向量进行加密、解密和密文点积
+        self.crypto = crypto if crypto is not None else PaillierBackend(n_jobs=1)
         ## 中间计算结果
         self.data = {}
         ## 与其他节点的连接状况
         self.other_client = {}
+        ## 当前公钥对应的预计算混淆因子池
+        self.obfuscators = None
 
     ## 与其他参与方建立连接
     def connect(self, client_name, target_client):
@@ -27,10 +33,25 @@ class Client:
     def send_data(self, data, target_client):
         target_client.data.update(data)
 
+    ## 获取公钥对应的混淆因子池，公钥轮换后重新建立
+    def get_obfuscators(self, public_key):
+        pool_size = self.config.get('obfuscator_pool_size', 0)
+        if pool_size <= 0:
+            return None
+        if self.obfuscators is None or self.obfuscators.public_key != public_key:
+            self.close_obfuscators()
+            self.obfuscators = ObfuscatorPool(public_key, size=pool_size)
+        return self.obfuscators
+
+    def close_obfuscators(self):
+        if self.obfuscators is not None:
+            self.obfuscators.close()
+            self.obfuscators = None
+
 
 class ClientA(Client):
-    def __init__(self, X, config):
-        super().__init__(config)
+    def __init__(self, X, config, crypto=None):
+        super().__init__(config, crypto)
         self.X = X
         self.weights = np.zeros(X.shape[1])
 
@@ -40,7 +61,7 @@ class ClientA(Client):
 
     ## 加密梯度的计算，对应step4
     def compute_encrypted_dJ_a(self, encrypted_u):
-        encrypted_dJ_a = self.X.T.dot(encrypted_u) + self.config['lambda'] * self.weights
+        encrypted_dJ_a = self.crypto.dot(self.X.T, encrypted_u) + self.config['lambda'] * self.weights
         return encrypted_dJ_a
 
     ##参数的更新
@@ -56,8 +77,9 @@ class ClientA(Client):
         z_a = self.compute_z_a()
         u_a = 0.25 * z_a
         z_a_square = z_a ** 2
-        encrypted_u_a = np.asarray([public_key.encrypt(x) for x in u_a])
-        encrypted_z_a_square = np.asarray([public_key.encrypt(x) for x in z_a_square])
+        obfuscators = self.get_obfuscators(public_key)
+        encrypted_u_a = self.crypto.encrypt(public_key, u_a, obfuscators)
+        encrypted_z_a_square = self.crypto.encrypt(public_key, z_a_square, obfuscators)
         dt.update({"encrypted_u_a": encrypted_u_a})
         data_to_B = {"encrypted_u_a": encrypted_u_a, "encrypted_z_a_square": encrypted_z_a_square}
         self.send_data(data_to_B, self.other_client[client_B_name])
@@ -87,8 +109,8 @@ class ClientA(Client):
 
 
 class ClientB(Client):
-    def __init__(self, X, y, config):
-        super().__init__(config)
+    def __init__(self, X, y, config, crypto=None):
+        super().__init__(config, crypto)
         self.X = X
         self.y = y
         self.weights = np.zeros(X.shape[1])
@@ -100,7 +122,7 @@ class ClientB(Client):
         return z_b, u_b
 
     def compute_encrypted_dJ_b(self, encrypted_u):
-        encrypted_dJ_b = self.X.T.dot(encrypted_u) + self.config['lambda'] * self.weights
+        encrypted_dJ_b = self.crypto.dot(self.X.T, encrypted_u) + self.config['lambda'] * self.weights
         return encrypted_dJ_b
 
     def update_weight(self, dJ_b):
@@ -116,7 +138,7 @@ class ClientB(Client):
             print("B step 1 exception: %s" % e)
         try:
             z_b, u_b = self.compute_u_b()
-            encrypted_u_b = np.asarray([public_key.encrypt(x) for x in u_b])
+            encrypted_u_b = self.crypto.encrypt(public_key, u_b, self.get_obfuscators(public_key))
             dt.update({"encrypted_u_b": encrypted_u_b})
             dt.update({"z_b": z_b})
         except Exception as e:
@@ -168,19 +190,21 @@ class ClientC(Client):
     Client C as trusted dealer.
     """
 
-    def __init__(self, A_d_shape, B_d_shape, config):
-        super().__init__(config)
+    def __init__(self, A_d_shape, B_d_shape, config, crypto=None):
+        super().__init__(config, crypto)
         self.A_data_shape = A_d_shape
         self.B_data_shape = B_d_shape
         self.public_key = None
         self.private_key = None
+        ## 密钥在整个会话中只生成一次，并按key_rotate_every轮换
+        self.key_manager = PaillierKeyManager(rotate_every=config.get('key_rotate_every', 0))
         ## 保存训练中的损失值（泰展开近似）
         self.loss = []
 
     ## C: step1
     def task_1(self, client_A_name, client_B_name):
         try:
-            public_key, private_key = paillier.generate_paillier_keypair()
+            public_key, private_key = self.key_manager.get_keypair()
             self.public_key = public_key
             self.private_key = private_key
         except Exception as e:
@@ -198,8 +222,8 @@ class ClientC(Client):
             assert "encrypted_masked_dJ_a" in dt.keys() and "encrypted_masked_dJ_b" in dt.keys(), "Error: 'masked_dJ_a' from A or 'masked_dJ_b' from B in step 2 not successfully received."
             encrypted_masked_dJ_a = dt['encrypted_masked_dJ_a']
             encrypted_masked_dJ_b = dt['encrypted_masked_dJ_b']
-            masked_dJ_a = np.asarray([self.private_key.decrypt(x) for x in encrypted_masked_dJ_a])
-            masked_dJ_b = np.asarray([self.private_key.decrypt(x) for x in encrypted_masked_dJ_b])
+            masked_dJ_a = self.crypto.decrypt(self.private_key, encrypted_masked_dJ_a)
+            masked_dJ_b = self.crypto.decrypt(self.private_key, encrypted_masked_dJ_b)
         except Exception as e:
             print("C step 2 exception: %s" % e)
 
@@ -265,12 +289,15 @@ def vertical_logistic_regression(X, y, X_test, y_test, config):
     XA, XB, XA_test, XB_test = vertically_partition_data(X, X_test, config['A_idx'], config['B_idx'])
     print('XA:', XA.shape, '   XB:', XB.shape)
 
+    ## 同态加密后端，n_jobs为加密运算使用的进程数
+    crypto = PaillierBackend(n_jobs=config.get('n_jobs'))
+
     ## 各参与方的初始化
-    client_A = ClientA(XA, config)
+    client_A = ClientA(XA, config, crypto)
     print("Client_A successfully initialized.")
-    client_B = ClientB(XB, y, config)
+    client_B = ClientB(XB, y, config, crypto)
     print("Client_B successfully initialized.")
-    client_C = ClientC(XA.shape, XB.shape, config)
+    client_C = ClientC(XA.shape, XB.shape, config, crypto)
     print("Client_C successfully initialized.")
 
     ## 各参与方之间连接的建立
@@ -292,6 +319,9 @@ def vertical_logistic_regression(X, y, X_test, y_test, config):
         client_C.task_2("A", "B")
         client_A.task_3()
         client_B.task_3()
+    crypto.close()
+    client_A.close_obfuscators()
+    client_B.close_obfuscators()
     print("All process done.")
     return True
 
@@ -300,6 +330,12 @@ config = {
     'n_iter': 100,
     'lambda': 10,
     'lr': 0.05,
+    # 同态加密运算使用的进程数，None表示使用全部CPU核心
+    'n_jobs': None,
+    # 密钥轮换周期（迭代次数），0表示整个训练只使用一个密钥
+    'key_rotate_every': 0,
+    # 每个加密方预先计算的混淆因子r^n的数量，0表示不使用预计算
+    'obfuscator_pool_size': 1024,
     # 采用的数据集一共有30个特征
     'A_idx': [10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 26, 27, 28, 29],
     'B_idx': [0, 1, 2, 3, 4, 5, 6, 7, 8, 9],
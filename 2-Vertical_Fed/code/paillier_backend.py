@@ -0,0 +1,104 @@
+import os
+import multiprocessing
+import numpy as np
+from phe import paillier
+
+
+## 进程间只传递密文的大整数和指数，避免每个密文重复序列化公钥
+def _pack(encrypted):
+    return [(x.ciphertext(be_secure=False), x.exponent) for x in encrypted]
+
+
+def _unpack(public_key, packed):
+    return [paillier.EncryptedNumber(public_key, c, e) for c, e in packed]
+
+
+def _encrypt_chunk(args):
+    public_key, x, obfuscators = args
+    if obfuscators is None:
+        return _pack([public_key.encrypt(v) for v in x])
+    ## r_value=1时不做混淆，再乘上预先计算好的r^n完成混淆
+    encrypted = [public_key.encrypt(v, r_value=1) for v in x]
+    return [(e.ciphertext(be_secure=False) * r % public_key.nsquare, e.exponent)
+            for e, r in zip(encrypted, obfuscators)]
+
+
+def _decrypt_chunk(args):
+    private_key, packed = args
+    return [private_key.decrypt(x) for x in _unpack(private_key.public_key, packed)]
+
+
+def _dot_chunk(args):
+    public_key, X, packed = args
+    encrypted = np.asarray(_unpack(public_key, packed))
+    return _pack(X.dot(encrypted))
+
+
+class PaillierBackend:
+    """
+    Vectorized Paillier operations over whole vectors, spread across processes.
+    """
+
+    def __init__(self, n_jobs=None, chunks_per_job=4):
+        """
+        :param n_jobs: number of worker processes, None for all cores, 1 to run in the current process
+        :param chunks_per_job: number of chunks each vector is split into per worker
+        """
+        self.n_jobs = n_jobs or os.cpu_count()
+        self.chunks_per_job = chunks_per_job
+        self.pool = multiprocessing.Pool(self.n_jobs) if self.n_jobs > 1 else None
+
+    def _map(self, func, tasks):
+        if self.pool is None:
+            return [func(t) for t in tasks]
+        return self.pool.map(func, tasks)
+
+    def _split(self, x):
+        n_chunks = min(len(x), self.n_jobs * self.chunks_per_job)
+        return [c for c in np.array_split(x, max(n_chunks, 1)) if len(c) > 0]
+
+    def _split_packed(self, encrypted):
+        packed = _pack(encrypted)
+        bounds = np.cumsum([0] + [len(c) for c in self._split(np.arange(len(packed)))])
+        return [packed[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+    def encrypt(self, public_key, x, obfuscators=None):
+        """
+        Encrypt every element of x, equivalent to np.asarray([public_key.encrypt(v) for v in x]).
+        If an ObfuscatorPool for public_key is given, its precomputed r^n factors are used for obfuscation.
+        """
+        chunks = self._split(np.asarray(x))
+        factors = obfuscators.take(len(x)) if obfuscators is not None else None
+        tasks = []
+        start = 0
+        for chunk in chunks:
+            tasks.append((public_key, chunk.tolist(),
+                          factors[start:start + len(chunk)] if factors is not None else None))
+            start += len(chunk)
+        packed = [v for chunk in self._map(_encrypt_chunk, tasks) for v in chunk]
+        return np.asarray(_unpack(public_key, packed))
+
+    def decrypt(self, private_key, encrypted):
+        """
+        Decrypt every element of encrypted, equivalent to np.asarray([private_key.decrypt(v) for v in encrypted]).
+        """
+        tasks = [(private_key, chunk) for chunk in self._split_packed(encrypted)]
+        return np.asarray([v for chunk in self._map(_decrypt_chunk, tasks) for v in chunk])
+
+    def dot(self, X, encrypted):
+        """
+        Compute X.dot(encrypted) for a plaintext matrix X and an encrypted vector, one chunk of rows per task.
+        """
+        if len(encrypted) == 0:
+            return X.dot(encrypted)
+        public_key = encrypted[0].public_key
+        packed = _pack(encrypted)
+        tasks = [(public_key, rows, packed) for rows in self._split(np.asarray(X))]
+        result = [v for chunk in self._map(_dot_chunk, tasks) for v in chunk]
+        return np.asarray(_unpack(public_key, result))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
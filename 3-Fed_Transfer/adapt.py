@@ -86,114 +86,163 @@ def test_globalmodel_local(helper, data_sets, target_model):
     return globalmodel_local_acc
         
 
-def adapt_local(helper, train_data_sets, fisher, target_model, local_model, adaptedmodel_local_acc):    
-    for parame in target_model.parameters():
-        parame.requires_grad = False
-    for model_id in tqdm(range(len(train_data_sets))):
-        iteration = 0
-        model = local_model
-        if not helper.scratch:
-            model.copy_params(target_model.state_dict())
+def adapt_one(helper, train_data_sets, model_id, ewc, target_model, local_model, reseed=False):
+    """
+    Adapt the global model to one participant and evaluate it.
+    :param reseed: seed the random generators with the participant id (process pool)
+    :return: local accuracy of the adapted model
+    """
+    if reseed and not helper.random:
+        # one seed per participant, so the result does not depend on which job adapted it
+        helper.fix_random(train_data_sets[model_id][0])
+    iteration = 0
+    model = local_model
+    if not helper.scratch:
+        model.copy_params(target_model.state_dict())
+    if helper.multi_gpu:
+        model = torch.nn.DataParallel(model, dim=1).cuda()
+    if helper.freeze_base:
+        if helper.data_type == 'text':
+            freeze = 4
+        else:
+            freeze = 60
+        num = 0
+        for parame in model.parameters():
+            if num < freeze:
+                parame.requires_grad = False
+            num += 1
+        optimizer = torch.optim.SGD(filter(lambda p: p.requires_grad, model.parameters()), lr=helper.lr,
+                                    momentum=helper.momentum,
+                                    weight_decay=helper.decay)
+    else:
+        optimizer = torch.optim.SGD(model.parameters(), lr=helper.lr,
+                                    momentum=helper.momentum,
+                                    weight_decay=helper.decay)
+    model.train()
+    if helper.data_type == 'text':
+        current_data_model, train_data_all = train_data_sets[model_id]
+        ntokens = len(helper.corpus.dictionary)
         if helper.multi_gpu:
-            model = torch.nn.DataParallel(model, dim=1).cuda()
-        if helper.freeze_base:
-            if helper.data_type == 'text':
-                freeze = 4
-            else:
-                freeze = 60
-            num = 0
-            for parame in model.parameters():
-                if num < freeze:
-                    parame.requires_grad = False
-                num += 1
-            optimizer = torch.optim.SGD(filter(lambda p: p.requires_grad, model.parameters()), lr=helper.lr,
-                                        momentum=helper.momentum,
-                                        weight_decay=helper.decay)
+            hidden = model.module.init_hidden(helper.batch_size)
         else:
-            optimizer = torch.optim.SGD(model.parameters(), lr=helper.lr,
-                                        momentum=helper.momentum,
-                                        weight_decay=helper.decay)
-        model.train()
+            hidden = model.init_hidden(helper.batch_size)
+        trunk = len(train_data_all)//100*(100-helper.local_test_perc)
+        train_data = train_data_all[:trunk]
+        test_data = train_data_all[trunk:]
+    else:
+        _, (current_data_model, train_data) = train_data_sets[model_id]
+        image_trainset_weight = helper.train_label_histograms[current_data_model]
+        image_trainset_weight = image_trainset_weight/image_trainset_weight.sum()
+    
+    start_time = time.time()
+    for internal_epoch in range(1, helper.adaptation_epoch + 1):
+        model.train() 
+        running_loss =0.0           
         if helper.data_type == 'text':
-            current_data_model, train_data_all = train_data_sets[model_id]
-            ntokens = len(helper.corpus.dictionary)
-            if helper.multi_gpu:
-                hidden = model.module.init_hidden(helper.batch_size)
-            else:
-                hidden = model.init_hidden(helper.batch_size)
-            trunk = len(train_data_all)//100*(100-helper.local_test_perc)
-            train_data = train_data_all[:trunk]
-            test_data = train_data_all[trunk:]
+            data_iterator = range(0, train_data.size(0) - 1, helper.bptt)
         else:
-            _, (current_data_model, train_data) = train_data_sets[model_id]
-            image_trainset_weight = np.zeros(10)
-            for ind, x in enumerate(train_data):
-                _, label = x
-                for labeli in range(10):
-                    image_trainset_weight[labeli] += (label==labeli).sum()
-            image_trainset_weight = image_trainset_weight/image_trainset_weight.sum()
-        
-        start_time = time.time()
-        for internal_epoch in range(1, helper.adaptation_epoch + 1):
-            model.train() 
-            running_loss =0.0           
+            data_iterator = train_data
+        batch_num = 0                
+        for batch_id, batch in enumerate(data_iterator):
+            iteration += 1
+            batch_num += 1
+            optimizer.zero_grad()
+            data, targets = helper.get_batch(train_data, batch,
+                                              evaluation=False)
             if helper.data_type == 'text':
-                data_iterator = range(0, train_data.size(0) - 1, helper.bptt)
-            else:
-                data_iterator = train_data
-            batch_num = 0                
-            for batch_id, batch in enumerate(data_iterator):
-                iteration += 1
-                batch_num += 1
-                optimizer.zero_grad()
-                data, targets = helper.get_batch(train_data, batch,
-                                                  evaluation=False)
-                if helper.data_type == 'text':
-                    hidden = tuple([each.data for each in hidden])
-                    if helper.kd:
-                        with torch.no_grad():
-                            teacher_outputs, _ = target_model(data, hidden)
-                    output, hidden = model(data, hidden)
-                    if helper.ewc:
-                        loss = criterion_ewc(target_model, model, fisher, output.view(-1, ntokens), targets, criterion, lamb=helper.lamb)
-                    elif helper.kd:
-                        loss = criterion_kd(helper, output.view(-1, ntokens), targets, teacher_outputs.view(-1, ntokens))
-                    else:
-                        loss = criterion(output.view(-1, ntokens), targets)
+                hidden = tuple([each.data for each in hidden])
+                if helper.kd:
+                    with torch.no_grad():
+                        teacher_outputs, _ = target_model(data, hidden)
+                output, hidden = model(data, hidden)
+                if helper.ewc:
+                    loss = criterion_ewc(ewc, model, output.view(-1, ntokens), targets, criterion)
+                elif helper.kd:
+                    loss = criterion_kd(helper, output.view(-1, ntokens), targets, teacher_outputs.view(-1, ntokens))
                 else:
-                    output = model(data)
-                    if helper.ewc:
-                        loss = criterion_ewc(target_model, model, fisher, output, targets, criterion, lamb=helper.lamb)
-                    elif helper.kd:
-                        with torch.no_grad():
-                            teacher_outputs = target_model(data)
-                        loss = criterion_kd(helper, output, targets, teacher_outputs)
-                    else:
-                        loss = criterion(output, targets)
-                        running_loss += loss.item()
-                #writer.add_scalar('loss_train',running_loss/1000,internal_epoch)
-                loss.backward()
-                if helper.data_type == 'text':
-                    # `clip_grad_norm` helps prevent the exploding gradient
-                    # problem in RNNs / LSTMs.
-                    torch.nn.utils.clip_grad_norm_(model.parameters(), helper.params['clip'])
-                    optimizer.step()
+                    loss = criterion(output.view(-1, ntokens), targets)
+            else:
+                output = model(data)
+                if helper.ewc:
+                    loss = criterion_ewc(ewc, model, output, targets, criterion)
+                elif helper.kd:
+                    with torch.no_grad():
+                        teacher_outputs = target_model(data)
+                    loss = criterion_kd(helper, output, targets, teacher_outputs)
                 else:
-                    optimizer.step()
-        t = time.time()
-        #writer.flush()
-        logger.info(f'time spent on local adaptation: {t-start_time}')
-        logger.info(f'testing adapted model on local testset at model_id: {model_id}')
-        if helper.data_type == 'text':
-            local_acc = eval_one_participant(helper, test_data, model)
-            adaptedmodel_local_acc.append(local_acc)
-        else:
-            _, _, correct_class_acc = test(helper=helper, data_source=helper.test_data, model=model)
-            adaptedmodel_local_acc.append((correct_class_acc*image_trainset_weight).sum())
-        logger.info(f'time spent on testing: {time.time() - t}')
+                    loss = criterion(output, targets)
+                    running_loss += loss.item()
+            #writer.add_scalar('loss_train',running_loss/1000,internal_epoch)
+            loss.backward()
+            if helper.data_type == 'text':
+                # `clip_grad_norm` helps prevent the exploding gradient
+                # problem in RNNs / LSTMs.
+                torch.nn.utils.clip_grad_norm_(model.parameters(), helper.params['clip'])
+                optimizer.step()
+            else:
+                optimizer.step()
+    t = time.time()
+    #writer.flush()
+    logger.info(f'time spent on local adaptation: {t-start_time}')
+    logger.info(f'testing adapted model on local testset at model_id: {model_id}')
+    if helper.data_type == 'text':
+        local_acc = eval_one_participant(helper, test_data, model)
+    else:
+        _, _, correct_class_acc = test(helper=helper, data_source=helper.test_data, model=model)
+        local_acc = (correct_class_acc*image_trainset_weight).sum()
+    logger.info(f'time spent on testing: {time.time() - t}')
+    return local_acc
+
+
+_adapt_context = None
+
+
+def _init_adapt_worker(helper, train_data_sets, ewc, target_model, local_model, num_threads):
+    # the workers are forked, the helper, data and models are inherited rather than pickled
+    global _adapt_context
+    _adapt_context = (helper, train_data_sets, ewc, target_model, local_model)
+    torch.set_num_threads(num_threads)
+
+
+def _adapt_worker(model_id):
+    helper, train_data_sets, ewc, target_model, local_model = _adapt_context
+    return adapt_one(helper, train_data_sets, model_id, ewc, target_model, local_model, reseed=True)
+
+
+def adapt_local(helper, train_data_sets, ewc, target_model, local_model, adaptedmodel_local_acc):    
+    for parame in target_model.parameters():
+        parame.requires_grad = False
+
+    workers = min(helper.adapt_workers, len(train_data_sets))
+    if workers > 1 and (helper.device.type == 'cuda' or helper.multi_gpu):
+        # CUDA can not be used from forked processes
+        logger.warning('adapt_workers is only supported on CPU, adapting participants sequentially')
+        workers = 1
+
+    if workers > 1:
+        # intra-op threads per job, so the jobs do not compete for all cores
+        num_threads = helper.adapt_threads or max(1, os.cpu_count() // workers)
+        pool = torch.multiprocessing.get_context('fork').Pool(
+            workers, initializer=_init_adapt_worker,
+            initargs=(helper, train_data_sets, ewc, target_model, local_model, num_threads))
+        # imap returns the results in participant order, so the periodic .npy stays resumable
+        results = pool.imap(_adapt_worker, range(len(train_data_sets)))
+    else:
+        if helper.adapt_threads:
+            torch.set_num_threads(helper.adapt_threads)
+        pool = None
+        results = (adapt_one(helper, train_data_sets, model_id, ewc, target_model, local_model)
+                   for model_id in range(len(train_data_sets)))
+
+    for model_id, local_acc in enumerate(tqdm(results, total=len(train_data_sets))):
+        adaptedmodel_local_acc.append(local_acc)
         if (model_id+1)%2==0 or (model_id+1)==len(train_data_sets):
             logger.info(f'Saved adaptedmodel_local_acc at model_id: {model_id}')
             np.save(helper.save_name + '_AdaptedModel_LocalTest_Acc.npy',np.array(adaptedmodel_local_acc))
+
+    if pool is not None:
+        pool.close()
+        pool.join()
     
  
 
@@ -255,13 +304,11 @@ if __name__ == '__main__':
         if adaptation_helper.ewc:
             fisher_path = f"{adaptation_helper.repo_path}/" \
                 f"{adaptation_helper.resumed_fisher}"
-            if not os.path.exists(fisher_path):
-                fisher = fisher_matrix_diag(adaptation_helper, adaptation_helper.auxiliary_data, adaptation_helper.target_model, criterion)                
-                torch.save(fisher, fisher_path)
-            else:
-                fisher = torch.load(fisher_path)
+            # reference parameters and Fisher diagonal are taken once for the whole adaptation run
+            ewc = EWCState.load_or_compute(adaptation_helper, adaptation_helper.auxiliary_data,
+                                           adaptation_helper.target_model, criterion, fisher_path)
         else:
-            fisher = None
+            ewc = None
         random.seed(66)
         if not os.path.exists(adaptation_helper.save_name + '_AdaptedModel_LocalTest_Acc.npy'):
             adaptedmodel_local_acc = list()
@@ -279,7 +326,7 @@ if __name__ == '__main__':
             #t = time.time()
             #train_sets = [(pos, adaptation_helper.train_data[pos]) for pos in subset_data_chunks]
         t1 = time.time()
-        adapt_local(helper=adaptation_helper, train_data_sets=[(pos, adaptation_helper.train_data[pos]) for pos in subset_data_chunks], fisher=fisher, target_model=adaptation_helper.target_model, local_model=adaptation_helper.local_model, adaptedmodel_local_acc=adaptedmodel_local_acc)
+        adapt_local(helper=adaptation_helper, train_data_sets=[(pos, adaptation_helper.train_data[pos]) for pos in subset_data_chunks], ewc=ewc, target_model=adaptation_helper.target_model, local_model=adaptation_helper.local_model, adaptedmodel_local_acc=adaptedmodel_local_acc)
         logger.info(f'time spent on local adaptation: {time.time() - t1}')
  #accumulate weight of all participants.
     """weight_accumulator = dict()
@@ -0,0 +1,117 @@
+import argparse
+import copy
+import math
+import time
+
+import torch
+
+from models.resnet import ResNet18
+from models.word_model import RNNModel
+from utils.flat_params import FlatParams
+from utils.helper import Helper
+
+### compare the per-layer dict aggregation (accumulate, average, DP norm and clipping) with the flat-buffer one
+
+
+def dict_round(target_model, local_models, eta, tied):
+    weight_accumulator = dict()
+    for name, data in target_model.state_dict().items():
+        if tied and name == 'decoder.weight' or '__' in name:
+            continue
+        weight_accumulator[name] = torch.zeros_like(data)
+    for model in local_models:
+        for name, data in model.state_dict().items():
+            if tied and name == 'decoder.weight' or '__' in name:
+                continue
+            weight_accumulator[name].add_(data - target_model.state_dict()[name])
+    for name, data in target_model.state_dict().items():
+        if tied and name == 'decoder.weight' or data.dtype != torch.float32:
+            continue
+        data.add_(weight_accumulator[name] * (eta / len(local_models)))
+
+
+def dict_clip(model, target_model, s_norm, tied):
+    squared_sum = 0
+    for name, layer in model.named_parameters():
+        squared_sum += torch.sum(torch.pow(layer.data - target_model.state_dict()[name].data, 2))
+    model_norm = math.sqrt(squared_sum)
+    if model_norm > s_norm:
+        norm_scale = s_norm / model_norm
+        for name, layer in model.named_parameters():
+            if tied and name == 'decoder.weight' or '__' in name:
+                continue
+            clipped_difference = norm_scale * (layer.data - target_model.state_dict()[name])
+            layer.data.copy_(target_model.state_dict()[name] + clipped_difference)
+
+
+def flat_round(target_flat, local_flats, eta):
+    weight_accumulator = torch.zeros_like(target_flat.flat)
+    update = torch.empty_like(target_flat.flat)
+    for local_flat in local_flats:
+        torch.sub(local_flat.flat, target_flat.flat, out=update)
+        weight_accumulator.add_(update)
+    target_flat.flat.add_(weight_accumulator.mul_(eta / len(local_flats)))
+
+
+def flat_clip(local_flat, target_flat, s_norm):
+    model_norm = Helper.model_dist_norm(local_flat, target_flat)
+    if model_norm > s_norm:
+        local_flat.params.sub_(target_flat.params).mul_(s_norm / model_norm).add_(target_flat.params)
+
+
+def timed(func, repeat, device):
+    func()
+    if device.type == 'cuda':
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    if device.type == 'cuda':
+        torch.cuda.synchronize()
+    return (time.perf_counter() - start) / repeat
+
+
+def bench(name, build, args, device, tied=False):
+    target = build().to(device)
+    local_models = []
+    for _ in range(args.no_models):
+        model = copy.deepcopy(target)
+        with torch.no_grad():
+            for p in model.parameters():
+                p.add_(torch.randn_like(p) * 1e-2)
+        local_models.append(model)
+
+    # the two paths must give the same aggregated model
+    ref_target = copy.deepcopy(target)
+    flat_target = copy.deepcopy(target)
+    target_flat = FlatParams(flat_target)
+    local_flats = [FlatParams(copy.deepcopy(m)) for m in local_models]
+    dict_round(ref_target, local_models, args.eta, tied)
+    flat_round(target_flat, local_flats, args.eta)
+    for (k, a), b in zip(ref_target.state_dict().items(), flat_target.state_dict().values()):
+        assert torch.allclose(a, b, atol=1e-6), k
+
+    t_dict = timed(lambda: dict_round(ref_target, local_models, args.eta, tied), args.repeat, device)
+    t_flat = timed(lambda: flat_round(target_flat, local_flats, args.eta), args.repeat, device)
+    print('%-9s aggregation of %d models: per-layer %8.2f ms, flat %8.2f ms, speedup %5.1fx'
+          % (name, args.no_models, t_dict * 1000, t_flat * 1000, t_dict / t_flat))
+
+    t_dict = timed(lambda: dict_clip(local_models[0], ref_target, 1e-3, tied), args.repeat, device)
+    t_flat = timed(lambda: flat_clip(local_flats[0], target_flat, 1e-3), args.repeat, device)
+    print('%-9s DP norm + clipping:            per-layer %8.2f ms, flat %8.2f ms, speedup %5.1fx'
+          % (name, t_dict * 1000, t_flat * 1000, t_dict / t_flat))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fed_Transfer aggregation benchmark')
+    parser.add_argument('--no_models', type=int, default=10)
+    parser.add_argument('--eta', type=float, default=1)
+    parser.add_argument('--ntokens', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+
+    bench('ResNet18', lambda: ResNet18(name='bench', created_time=''), args, device)
+    bench('RNNModel', lambda: RNNModel(name='bench', created_time='', rnn_type='LSTM', ntoken=args.ntokens,
+                                       ninp=200, nhid=200, nlayers=2, dropout=0.2, tie_weights=True),
+          args, device, tied=True)
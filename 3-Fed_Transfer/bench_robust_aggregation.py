@@ -0,0 +1,54 @@
+import argparse
+import resource
+import subprocess
+import sys
+import time
+
+import torch
+
+from utils.robust_aggregation import coordinate_median, trimmed_mean
+
+### peak RSS and wall time of the median / trimmed mean aggregation with many participants,
+### every mode runs in its own process so the peak RSS of one does not hide the other
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(args):
+    torch.manual_seed(0)
+    updates = torch.randn(args.no_models, args.num_coords)
+    base = peak_rss_mb()
+    start = time.perf_counter()
+    if args.mode == 'median_full':
+        result = updates.median(dim=0).values
+    elif args.mode == 'median_chunked':
+        result = coordinate_median(updates, args.chunk_size)
+    elif args.mode == 'trimmed_full':
+        trim = int(args.trim_ratio * args.no_models)
+        result = updates.sort(dim=0).values[trim:args.no_models - trim].mean(dim=0)
+    else:
+        result = trimmed_mean(updates, args.trim_ratio, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print('%-15s participants=%d coords=%d: %7.2f s, updates %7.1f MB, extra peak RSS %7.1f MB, checksum %.6f'
+          % (args.mode, args.no_models, args.num_coords, elapsed, updates.numel() * 4 / 2 ** 20,
+             peak_rss_mb() - base, result.double().sum().item()))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='robust aggregation benchmark')
+    parser.add_argument('--no_models', type=int, default=128)
+    parser.add_argument('--num_coords', type=int, default=2_000_000)
+    parser.add_argument('--chunk_size', type=int, default=1 << 16)
+    parser.add_argument('--trim_ratio', type=float, default=0.1)
+    parser.add_argument('--mode', type=str, default=None)
+    args = parser.parse_args()
+
+    if args.mode is not None:
+        run(args)
+    else:
+        for mode in ['median_full', 'median_chunked', 'trimmed_full', 'trimmed_chunked']:
+            subprocess.run([sys.executable, __file__, '--mode', mode, '--no_models', str(args.no_models),
+                            '--num_coords', str(args.num_coords), '--chunk_size', str(args.chunk_size),
+                            '--trim_ratio', str(args.trim_ratio)], check=True)
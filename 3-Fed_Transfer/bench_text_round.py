@@ -0,0 +1,59 @@
+import argparse
+import time
+
+import torch
+
+from training import train
+from utils.utils import test
+from utils.text_helper import TextHelper
+
+### time of a federated round of the word model (local training, DP clipping and noise, aggregation)
+### on synthetic participants, runs on the CPU as well as on a GPU
+
+
+def build_helper(args):
+    params = {'data_type': 'text', 'device': args.device, 'log': False, 'tb': False,
+              'batch_size': args.batch_size, 'test_batch_size': 10, 'bptt': args.bptt,
+              'lr': 20, 'momentum': 0, 'decay': 0, 'retrain_no_times': 1, 'clip': 0.25,
+              'no_models': args.no_models, 'eta': 1, 'aggregation_type': 'averaging',
+              'diff_privacy': args.diff_privacy, 's_norm': 15, 'sigma': 0.01, 'local_test_perc': 10,
+              'emsize': args.emsize, 'nhid': args.emsize, 'nlayers': 2, 'dropout': 0.2, 'tied': True}
+    helper = TextHelper(current_time='bench', params=params, name='bench')
+    torch.manual_seed(0)
+    helper.n_tokens = args.ntokens
+    helper.corpus = argparse.Namespace(dictionary=range(args.ntokens))
+    helper.train_data = [helper.batchify(torch.randint(args.ntokens, (args.tokens_per_participant,),
+                                                       dtype=torch.int32), helper.batch_size, helper.device)
+                         for _ in range(args.no_models)]
+    helper.test_data = helper.batchify(torch.randint(args.ntokens, (args.tokens_per_participant,)),
+                                       helper.test_batch_size, helper.device)
+    helper.create_model()
+    return helper
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='text federated round benchmark')
+    parser.add_argument('--device', type=str, default='cuda' if torch.cuda.is_available() else 'cpu')
+    parser.add_argument('--no_models', type=int, default=10)
+    parser.add_argument('--ntokens', type=int, default=5000)
+    parser.add_argument('--emsize', type=int, default=200)
+    parser.add_argument('--batch_size', type=int, default=20)
+    parser.add_argument('--bptt', type=int, default=64)
+    parser.add_argument('--tokens_per_participant', type=int, default=5000)
+    parser.add_argument('--diff_privacy', action='store_true')
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    helper = build_helper(args)
+    train_sets = list(enumerate(helper.train_data))
+    for federated_round in range(1, args.rounds + 1):
+        start = time.perf_counter()
+        weight_acc = train(helper=helper, train_data_sets=train_sets,
+                           local_model=helper.local_model, target_model=helper.target_model)
+        helper.average_shrink_models(target_model=helper.target_model, weight_accumulator=weight_acc)
+        if helper.device.type == 'cuda':
+            torch.cuda.synchronize(helper.device)
+        elapsed = time.perf_counter() - start
+        loss, acc, _ = test(helper=helper, data_source=helper.test_data, model=helper.target_model)
+        print('round %d on %s: %d participants in %.2f s, test loss %.3f'
+              % (federated_round, helper.device, args.no_models, elapsed, loss))
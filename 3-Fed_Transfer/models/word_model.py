@@ -50,7 +50,11 @@ class RNNModel(SimpleNet):
 #         hidden = tuple([h.permute(1, 0, 2).contiguous() for h in hidden])
         emb = self.drop(self.encoder(input))
         ######### for multi-gpu
-        self.rnn.flatten_parameters()
+        # weights that are views of FlatParams.flat stay there, flattening them into cuDNN's buffer
+        # would make the next FlatParams access copy them back (DataParallel replicas are still flattened)
+        flat_params = getattr(self, 'flat_params', None)
+        if flat_params is None or not flat_params.holds(self.rnn.weight_ih_l0):
+            self.rnn.flatten_parameters()
         
         output, hidden = self.rnn(emb, hidden)
         output = self.drop(output)
@@ -33,25 +33,18 @@ def train(helper, train_data_sets, local_model, target_model):
     :return:
     """
 
-    # Accumulate weights for all participants.
-    weight_accumulator = dict()
+    # Both models keep their weights in one flat tensor (tied and modified weights are not in it),
+    # so the updates are accumulated with one op per participant.
+    target_flat = helper.get_flat(target_model)
+    local_flat = helper.get_flat(local_model)
 
-    for name, data in target_model.state_dict().items():
-        # don't scale tied and modified weights:
-        if helper.tied and name == 'decoder.weight' or '__'in name:
-            continue
-        if helper.aggregation_type == 'averaging':
-            weight_accumulator[name] = torch.zeros_like(data)
-        else:
-            # used  for median aggregation
-            weight_per_model = list(data.shape)
-            weight_accumulator[name] = torch.zeros([helper.no_models] + weight_per_model)
-    
-    # This is for calculating distances for Differential privacy
-    if helper.diff_privacy:
-        target_params_variables = dict()
-        for name, param in target_model.named_parameters():
-            target_params_variables[name] = target_model.state_dict()[name].clone().detach().requires_grad_(False)
+    # Accumulate weights for all participants.
+    if helper.aggregation_type == 'averaging':
+        weight_accumulator = torch.zeros_like(target_flat.flat)
+    else:
+        # used  for median and trimmed mean aggregation
+        weight_accumulator = torch.zeros(helper.no_models, target_flat.flat.numel())
+    update = torch.empty_like(target_flat.flat)
 
     for model_id in range(helper.no_models):
         model = local_model
@@ -102,17 +95,12 @@ def train(helper, train_data_sets, local_model, target_model):
 
                 if helper.diff_privacy:
                     optimizer.step()
-                    model_norm = helper.model_dist_norm(model, target_params_variables)
+                    # the target model is not changed during the round, it is the reference for the distance
+                    model_norm = helper.model_dist_norm(local_flat, target_flat)
                     if model_norm > helper.s_norm:
                         norm_scale = helper.s_norm / (model_norm)
-                        for name, layer in model.named_parameters():
-                            #### don't scale tied weights:
-                            if helper.tied and name == 'decoder.weight' or '__'in name:
-                                continue
-                            clipped_difference = norm_scale * (
-                            layer.data - target_model.state_dict()[name])
-                            layer.data.copy_(
-                                target_model.state_dict()[name] + clipped_difference)
+                        local_params = local_flat.params
+                        local_params.sub_(target_flat.params).mul_(norm_scale).add_(target_flat.params)
                 elif helper.data_type == 'text':
                     # `clip_grad_norm` helps prevent the exploding gradient
                     # problem in RNNs / LSTMs.
@@ -141,13 +129,11 @@ def train(helper, train_data_sets, local_model, target_model):
             np.save(helper.save_name + '_TargetModel_LocalTest_Acc.npy',np.array(targetmodel_local_acc))"""
         
         ### sum up the model updates
-        for name, data in model.state_dict().items():
-            if helper.tied and name == 'decoder.weight' or '__'in name:
-                continue
-            if helper.aggregation_type == 'averaging':
-                weight_accumulator[name].add_(data - target_model.state_dict()[name])
-            else:
-                weight_accumulator[name][model_id].add_(data.cpu() - target_model.state_dict()[name].cpu())
+        torch.sub(local_flat.flat, target_flat.flat, out=update)
+        if helper.aggregation_type == 'averaging':
+            weight_accumulator.add_(update)
+        else:
+            weight_accumulator[model_id].copy_(update)
 
     return weight_accumulator
 
@@ -237,6 +223,9 @@ if __name__ == '__main__':
             elif runner_helper.aggregation_type == 'median':
                 runner_helper.median_aggregation(target_model=runner_helper.target_model,
                                                  weight_accumulator=weight_acc)
+            elif runner_helper.aggregation_type == 'trimmed_mean':
+                runner_helper.trimmed_mean_aggregation(target_model=runner_helper.target_model,
+                                                       weight_accumulator=weight_acc)
             else:
                 raise NotImplemented(f'Aggregation {runner_helper.aggregation_type} not yet implemented.')
             
@@ -0,0 +1,80 @@
+from collections import OrderedDict
+
+import torch
+
+
+class FlatParams:
+    """
+    The float32 entries of a model's state_dict packed into one contiguous tensor.
+
+    The model's parameters and buffers are re-pointed to views of that tensor, so the model keeps
+    working unchanged while whole-model arithmetic (averaging, norms, clipping) is a single op on
+    `flat`. Parameters come first, `params` is that prefix; buffers such as BatchNorm running
+    statistics follow. Tied weights are stored once, and names containing '__' are left out as in
+    training.py. `index` maps every stored name to its (start, end, shape) in `flat`.
+    """
+
+    def __init__(self, model):
+        state = model.state_dict(keep_vars=True)
+        param_names = [name for name, _ in model.named_parameters()]
+        names = param_names + [name for name in state if name not in param_names]
+
+        self.index = OrderedDict()
+        self.tensors = []
+        seen = set()
+        start = 0
+        self.num_params = 0
+        for name in names:
+            tensor = state[name]
+            if tensor.dtype != torch.float32 or '__' in name or id(tensor) in seen:
+                continue
+            seen.add(id(tensor))
+            self.index[name] = (start, start + tensor.numel(), tensor.shape)
+            self.tensors.append(tensor)
+            start += tensor.numel()
+            if name in param_names:
+                self.num_params = start
+
+        self._flat = torch.empty(start, dtype=torch.float32, device=self.tensors[0].device)
+        self.views = [self._flat[s:e].view(shape) for s, e, shape in self.index.values()]
+        with torch.no_grad():
+            for tensor, view in zip(self.tensors, self.views):
+                view.copy_(tensor.data)
+                tensor.data = view
+
+    def __deepcopy__(self, memo):
+        # the views can not follow a copied model, it gets its own FlatParams on first use (Helper.get_flat)
+        return None
+
+    def holds(self, tensor):
+        """
+        :return: whether the tensor is stored in `flat`
+        """
+        return tensor.untyped_storage().data_ptr() == self._flat.untyped_storage().data_ptr()
+
+    def sync(self):
+        """
+        Re-attach entries that were re-pointed elsewhere since the last access,
+        e.g. by cuDNN's RNN flatten_parameters, which moves LSTM weights into its own buffer.
+        """
+        with torch.no_grad():
+            for tensor, view in zip(self.tensors, self.views):
+                if tensor.data_ptr() != view.data_ptr():
+                    view.copy_(tensor.data)
+                    tensor.data = view
+
+    @property
+    def flat(self):
+        self.sync()
+        return self._flat
+
+    @property
+    def params(self):
+        return self.flat[:self.num_params]
+
+    def state_dict(self):
+        """
+        :return: name -> view of `flat`, shaped like the model's state_dict entries
+        """
+        flat = self.flat
+        return OrderedDict((name, flat[s:e].view(shape)) for name, (s, e, shape) in self.index.items())
@@ -13,6 +13,8 @@ import torch.optim as optim
 import torch.nn as nn
 from torch.nn import functional as F
 from torch import autograd
+from utils.flat_params import FlatParams
+from utils.robust_aggregation import coordinate_median, trimmed_mean
 
 
 
@@ -27,7 +29,7 @@ class Helper:
         self.poisoned_data = None
         self.test_data_poison = None
         self.writer = None
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        self.device = torch.device(params.get('device', 'cuda' if torch.cuda.is_available() else 'cpu'))
 
         self.params = params
         self.name = name
@@ -76,17 +78,23 @@ class Helper:
         self.no_models = self.params.get('no_models', None)
         self.retrain_no_times = self.params.get('retrain_no_times', 1)
         self.adaptation_epoch = self.params.get('adaptation_epoch', 100)
+        self.adapt_workers = self.params.get('adapt_workers', 1)
+        self.adapt_threads = self.params.get('adapt_threads', 0)
         self.eta = self.params.get('eta', 1)
 
         ## Differential privacy
         self.diff_privacy = self.params.get('diff_privacy', False)
         self.s_norm = self.params.get('s_norm', 1)
         self.sigma = self.params.get('sigma', 1)
+        # created on the model's device at the first noised aggregation, after fix_random
+        self.noise_generator = None
 
         ### TEXT PARAMS
         self.bptt = self.params.get('bptt', False)
         self.recreate_dataset = self.params.get('recreate_dataset', False)
         self.aggregation_type = self.params.get('aggregation_type', 'averaging')
+        self.trim_ratio = self.params.get('trim_ratio', 0.1)
+        self.aggregation_chunk_size = self.params.get('aggregation_chunk_size', 1 << 20)
         self.tied = self.params.get('tied', False)
 
         if self.log:
@@ -136,6 +144,15 @@ class Helper:
         for p in parameters:
             p.grad.data.mul_(clip_coef)
 
+    @staticmethod
+    def get_flat(model):
+        """
+        FlatParams of the model, built on first use and kept on the model afterwards.
+        """
+        if getattr(model, 'flat_params', None) is None:
+            model.flat_params = FlatParams(model)
+        return model.flat_params
+
     @staticmethod
     def fix_random(seed=0):
         # logger.warning('Setting random seed for reproducible results.')
@@ -150,56 +167,67 @@ class Helper:
     def average_shrink_models(self, weight_accumulator, target_model):
         """
         Perform FedAvg algorithm and perform some clustering on top of it.
+        :param weight_accumulator: summed updates, laid out as Helper.get_flat(target_model).flat,
+                                   it is scaled in place
         """
+        target_flat = self.get_flat(target_model).flat
+        update = weight_accumulator.mul_(self.eta / self.no_models)
 
-        for name, data in target_model.state_dict().items():
-            if self.params.get('tied', False) and name == 'decoder.weight':
-                continue
-            if data.dtype != torch.float32:
-                continue
-                
-            update_per_layer = weight_accumulator[name] * \
-                               (self.eta / self.no_models)
-
-            if self.diff_privacy:
-                update_per_layer.add_(self.dp_noise(data, self.sigma))
+        if self.diff_privacy:
+            if self.noise_generator is None:
+                self.noise_generator = torch.Generator(device=target_flat.device)
+                self.noise_generator.manual_seed(torch.initial_seed())
+            update.add_(self.dp_noise(target_flat, self.sigma, self.noise_generator))
 
-            data.add_(update_per_layer)
+        target_flat.add_(update)
 
         return True
 
     def median_aggregation(self, weight_accumulator, target_model):
         """
         Coordinate-wise median
-        :param weight_accumulator:
+        :param weight_accumulator: one row of updates per model, laid out as Helper.get_flat(target_model).flat
         :param target_model:
         :return:
         """
-        for name, data in target_model.state_dict().items():
-            if self.params.get('tied', False) and name == 'decoder.weight':
-                continue
-            if data.dtype != torch.float32:
-                continue
+        target_flat = self.get_flat(target_model).flat
+        update = coordinate_median(weight_accumulator, self.aggregation_chunk_size, device=target_flat.device)
 
-            update_per_layer = self.eta * weight_accumulator[name].median(dim=0).values
+        target_flat.add_(update, alpha=self.eta)
 
-            data.add_(update_per_layer.cuda())
+        return True
+
+    def trimmed_mean_aggregation(self, weight_accumulator, target_model):
+        """
+        Coordinate-wise trimmed mean, drops the trim_ratio largest and smallest updates of every coordinate
+        :param weight_accumulator: one row of updates per model, laid out as Helper.get_flat(target_model).flat
+        :param target_model:
+        :return:
+        """
+        target_flat = self.get_flat(target_model).flat
+        update = trimmed_mean(weight_accumulator, self.trim_ratio, self.aggregation_chunk_size,
+                              device=target_flat.device)
+
+        target_flat.add_(update, alpha=self.eta)
 
         return True
 
 
     @staticmethod
-    def dp_noise(param, sigma):
-
-        noised_layer = torch.cuda.FloatTensor(param.shape).normal_(mean=0, std=sigma)
+    def dp_noise(param, sigma, generator=None):
+        """
+        Gaussian noise shaped like `param`, drawn on its device in one call.
+        :param generator: torch.Generator on the same device as `param`, the default one if None
+        """
+        noised_layer = torch.empty_like(param).normal_(mean=0, std=sigma, generator=generator)
 
         return noised_layer
 
     @staticmethod
     def model_dist_norm(model, target_params):
-        squared_sum = 0
-        for name, layer in model.named_parameters():
-            if 'running_' in name or '_tracked' in name:
-                continue
-            squared_sum += torch.sum(torch.pow(layer.data - target_params[name].data, 2))
-        return math.sqrt(squared_sum)
\ No newline at end of file
+        """
+        :param model: FlatParams of the trained model
+        :param target_params: FlatParams of the model it started from
+        :return: L2 distance of the parameters (buffers such as running statistics are not included)
+        """
+        return torch.linalg.vector_norm(model.params - target_params.params).item()
\ No newline at end of file
@@ -6,6 +6,7 @@ import logging
 from models.resnet import ResNet18
 from torchvision import datasets, transforms
 import numpy as np
+from utils.label_index import LabelIndex
 logger = logging.getLogger("logger")
 import random
 
@@ -22,7 +23,8 @@ class ImageHelper(Helper):
                                 created_time=self.params['current_time'])
         target_model.to(self.device)
         if self.resumed_model:
-            loaded_params = torch.load(f"{self.params['repo_path']}/saved_models/{self.params['resumed_model']}")
+            loaded_params = torch.load(f"{self.params['repo_path']}/saved_models/{self.params['resumed_model']}",
+                                       map_location=self.device)
             target_model.load_state_dict(loaded_params['state_dict'])
             self.start_round = loaded_params['round']
             self.params['lr'] = loaded_params.get('lr', self.params['lr'])
@@ -58,6 +60,8 @@ class ImageHelper(Helper):
         train_image_weight_path = f"{self.params['repo_path']}/data/MNIST_train_image_weight.pt"
         auxiliary_data_path = f"{self.params['repo_path']}/data/MNIST_auxiliary_data.pt.tar"
         test_data_path = f"{self.params['repo_path']}/data/MNIST_test_data.pt.tar"
+        label_index_path = f"{self.params['repo_path']}/data/MNIST_train_labels.npy"
+        self.label_index = LabelIndex.from_dataset(self.train_dataset, label_index_path)
                         
         if self.recreate_dataset:
             ## sample indices for participants using Dirichlet distribution
@@ -80,6 +84,10 @@ class ImageHelper(Helper):
             self.train_image_weight = torch.load(train_image_weight_path)
             self.test_data = torch.load(test_data_path)
 
+        ### class histogram of every participant's training samples, used to weight the per-class accuracy
+        self.train_label_histograms = self.label_index.histograms(
+            [train_loader.sampler.indices for _, train_loader in self.train_data])
+
     def get_test(self, indices):
 
         test_loader = torch.utils.data.DataLoader(self.test_dataset,
@@ -126,13 +134,11 @@ class ImageHelper(Helper):
             dirichlet distribution to sample number of images in each class.
         """
 
-        cifar_classes = {}
-        for ind, x in enumerate(dataset):
-            _, label = x
-            if label in cifar_classes:
-                cifar_classes[label].append(ind)
-            else:
-                cifar_classes[label] = [ind]
+        if dataset is self.train_dataset and getattr(self, 'label_index', None) is not None:
+            label_index = self.label_index
+        else:
+            label_index = LabelIndex.from_dataset(dataset)
+        cifar_classes = label_index.class_indices()
 
         per_participant_list = defaultdict(list)
         no_classes = len(cifar_classes.keys())
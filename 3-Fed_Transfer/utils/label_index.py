@@ -0,0 +1,54 @@
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger("logger")
+
+
+class LabelIndex:
+    """
+    Labels of a dataset, read from its `targets` without decoding or transforming any image.
+    Gives the class -> indices lists used by the Dirichlet split and the per-participant class histograms.
+    """
+
+    def __init__(self, labels, num_classes=None):
+        self.labels = np.asarray(labels, dtype=np.int64)
+        self.num_classes = int(self.labels.max()) + 1 if num_classes is None else num_classes
+
+    @classmethod
+    def from_dataset(cls, dataset, cache_path=None):
+        """
+        :param cache_path: .npy file with the labels, written on the first call and read afterwards
+        """
+        if cache_path is not None and os.path.exists(cache_path):
+            labels = np.load(cache_path)
+            if len(labels) == len(dataset):
+                return cls(labels)
+            logger.info(f'label cache {cache_path} does not match the dataset, rebuilding it')
+
+        targets = getattr(dataset, 'targets', None)
+        if targets is not None:
+            labels = np.asarray(targets)
+        else:
+            # datasets without targets have to be read, this only happens once thanks to the cache
+            labels = np.array([label for _, label in dataset])
+        if cache_path is not None:
+            np.save(cache_path, labels)
+        return cls(labels)
+
+    def class_indices(self):
+        """
+        :return: class -> list of dataset indices in increasing order
+        """
+        order = np.argsort(self.labels, kind='stable')
+        bounds = np.cumsum(np.bincount(self.labels, minlength=self.num_classes))
+        return {label: indices.tolist() for label, indices in enumerate(np.split(order, bounds[:-1]))}
+
+    def histograms(self, indices_per_participant):
+        """
+        :param indices_per_participant: dataset indices of every participant
+        :return: [no_participants, num_classes] number of samples of each class
+        """
+        return np.stack([np.bincount(self.labels[np.asarray(indices, dtype=np.int64)], minlength=self.num_classes)
+                         for indices in indices_per_participant])
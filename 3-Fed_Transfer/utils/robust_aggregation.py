@@ -0,0 +1,50 @@
+import torch
+
+
+def _chunks(num_coords, chunk_size):
+    for start in range(0, num_coords, chunk_size):
+        yield start, min(start + chunk_size, num_coords)
+
+
+def coordinate_median(updates, chunk_size=1 << 20, device=None):
+    """
+    Coordinate-wise median of the participants' updates, computed chunk by chunk along the parameters,
+    so the temporaries never exceed no_models x chunk_size elements.
+    For an even number of participants it returns the lower of the two middle values, as torch.median does.
+
+    :param updates: [no_models, num_coords] tensor, may live on the CPU or on disk-backed memory
+    :param chunk_size: number of coordinates processed at once
+    :param device: device the median is computed and returned on, defaults to the device of `updates`
+    :return: [num_coords] tensor
+    """
+    device = updates.device if device is None else torch.device(device)
+    out = torch.empty(updates.shape[1], dtype=updates.dtype, device=device)
+    for start, end in _chunks(updates.shape[1], chunk_size):
+        chunk = updates[:, start:end].to(device)
+        out[start:end] = chunk.median(dim=0).values
+    return out
+
+
+def trimmed_mean(updates, trim_ratio=0.1, chunk_size=1 << 20, device=None):
+    """
+    Coordinate-wise trimmed mean: the int(trim_ratio * no_models) largest and smallest values of every
+    coordinate are dropped and the rest are averaged. Computed chunk by chunk like coordinate_median.
+
+    :param updates: [no_models, num_coords] tensor
+    :param trim_ratio: fraction removed at each end, must be below 0.5
+    :return: [num_coords] tensor
+    """
+    num_models = updates.shape[0]
+    trim = int(trim_ratio * num_models)
+    if not 0 <= trim_ratio < 0.5 or 2 * trim >= num_models:
+        raise ValueError(f'trim_ratio {trim_ratio} trims away all {num_models} participants')
+
+    device = updates.device if device is None else torch.device(device)
+    out = torch.empty(updates.shape[1], dtype=updates.dtype, device=device)
+    for start, end in _chunks(updates.shape[1], chunk_size):
+        # sorting along contiguous rows is faster than along the participant dimension
+        chunk = updates[:, start:end].to(device).t().contiguous()
+        if trim > 0:
+            chunk = chunk.sort(dim=1).values[:, trim:num_models - trim]
+        out[start:end] = chunk.mean(dim=1)
+    return out
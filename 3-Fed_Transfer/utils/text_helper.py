@@ -12,14 +12,19 @@ class TextHelper(Helper):
     corpus = None
 
     @staticmethod
-    def batchify(data, bsz):
+    def batchify(data, bsz, device='cpu'):
         # Work out how cleanly we can divide the dataset into bsz parts.
         nbatch = data.size(0) // bsz
         # Trim off any extra elements that wouldn't cleanly fit (remainders).
         data = data.narrow(0, 0, nbatch * bsz)
         # Evenly divide the data across the bsz batches.
-        data = data.view(bsz, -1).t().contiguous()
-        return data.cuda()
+        # token caches hold int32 ids, the model and the loss expect int64
+        data = data.view(bsz, -1).t().long().contiguous()
+        device = torch.device(device)
+        if device.type == 'cuda':
+            # copied from pinned memory so the transfers of consecutive participants overlap
+            return data.pin_memory().to(device, non_blocking=True)
+        return data.to(device)
 
     def get_sentence(self, tensor):
         result = list()
@@ -52,24 +57,26 @@ class TextHelper(Helper):
         dictionary = torch.load(word_dictionary_path)
         corpus_file_name = f"{self.params['repo_path']}/data/" \
             f"corpus_{self.params['number_of_total_participants']}.pt.tar"
-        corpus_file_name_diff_words = f"{self.params['repo_path']}/data/" \
-            f"corpus_{self.params['number_of_total_participants']}_diff_words.pt.tar"
-        corpus_file_name_voc_size = f"{self.params['repo_path']}/data/" \
-            f"corpus_{self.params['number_of_total_participants']}_voc_size.pt.tar"
-        if self.recreate_dataset:
-            self.corpus = Corpus(self.params, dictionary=dictionary)
-            torch.save(self.corpus, corpus_file_name)
-#             torch.save(self.corpus.diff_words, corpus_file_name_diff_words)
-#             torch.save(self.corpus.voc_size, corpus_file_name_voc_size)            
-        else:
+        token_cache_dir = f"{self.params['repo_path']}/data/" \
+            f"corpus_{self.params['number_of_total_participants']}_tokens"
+        if not self.recreate_dataset and os.path.exists(os.path.join(token_cache_dir, 'meta.json')):
+            self.corpus = Corpus.load_tokens(self.params, dictionary, token_cache_dir)
+        elif not self.recreate_dataset and os.path.exists(corpus_file_name):
+            # corpus pickled by older versions, converted once
             self.corpus = torch.load(corpus_file_name)
+            self.corpus.save_tokens(token_cache_dir)
+        else:
+            self.corpus = Corpus(self.params, dictionary=dictionary)
+            self.corpus.save_tokens(token_cache_dir)
         logger.info('Loading data. Completed.')
         ### PARSE DATA
         eval_batch_size = self.test_batch_size
-        self.train_data = [self.batchify(data_chunk, self.batch_size) for data_chunk in
+        self.train_data = [self.batchify(data_chunk, self.batch_size, self.device) for data_chunk in
                            self.corpus.train]
-        self.test_data = self.batchify(torch.cat(self.corpus.test), eval_batch_size)
-        self.auxiliary_data = self.batchify(self.corpus.auxiliary, eval_batch_size)        
+        self.test_data = self.batchify(torch.cat(self.corpus.test), eval_batch_size, self.device)
+        self.auxiliary_data = self.batchify(self.corpus.auxiliary, eval_batch_size, self.device)
+        if self.device.type == 'cuda':
+            torch.cuda.synchronize(self.device)
         self.n_tokens = len(self.corpus.dictionary)
 
     def create_model(self):
@@ -87,7 +94,8 @@ class TextHelper(Helper):
                                 dropout=self.params['dropout'], tie_weights=self.params['tied'])
         target_model.to(self.device)
         if self.resumed_model:
-            loaded_params = torch.load(f"{self.repo_path}/saved_models/{self.params['resumed_model']}")
+            loaded_params = torch.load(f"{self.repo_path}/saved_models/{self.params['resumed_model']}",
+                                       map_location=self.device)
             target_model.load_state_dict(loaded_params['state_dict'])
             self.start_round = loaded_params['round']
             self.params['lr'] = loaded_params.get('lr', self.params['lr'])
@@ -4,8 +4,13 @@ import json
 import re
 from tqdm import tqdm
 import random
+import numpy as np
+from multiprocessing import get_context
 
 filter_symbols = re.compile('[a-zA-Z]*')
+# the leading letters of every whitespace separated token, kept when there are at least two of them,
+# i.e. filter_symbols applied to each word of line.split() in a single pass over the line
+token_words = re.compile(r'(?<!\S)[a-zA-Z]{2,}')
 
 class Dictionary(object):
     def __init__(self):
@@ -20,26 +25,75 @@ class Dictionary(object):
 
 
 def get_word_list(line, dictionary):
-    splitted_words = json.loads(line.lower()).split()
     words = ['<bos>']
-    for word in splitted_words:
-        word = filter_symbols.search(word)[0]
-        if len(word)>1:
-            if dictionary.word2idx.get(word, False):
-                words.append(word)
-            else:
-                words.append('<unk>')
+    for word in token_words.findall(json.loads(line.lower())):
+        if dictionary.word2idx.get(word, False):
+            words.append(word)
+        else:
+            words.append('<unk>')
     words.append('<eos>')
 
     return words
 
 
+def get_word_ids(line, word2idx, bos, eos, unk):
+    """
+    Same as [word2idx[x] for x in get_word_list(line, dictionary)] without building the word list.
+    Words with index 0 become <unk>, as in get_word_list.
+    """
+    ids = [bos]
+    ids.extend([word2idx.get(word) or unk for word in token_words.findall(json.loads(line.lower()))])
+    ids.append(eos)
+    return ids
+
+
+def tokenize_file(path, word2idx):
+    """
+    :return: token ids of the file as an int32 array, number of tokens that did not appear
+     in the previous lines of the file, number of tokens
+    """
+    bos, eos, unk = word2idx['<bos>'], word2idx['<eos>'], word2idx['<unk>']
+    word_list = list()
+    seen = set()
+    diff_word = 0
+    with open(path, 'r') as f:
+        for line in f:
+            wordidx = get_word_ids(line, word2idx, bos, eos, unk)
+            diff_word += sum([i not in seen for i in wordidx])
+            seen.update(wordidx)
+            word_list.extend(wordidx)
+    return np.array(word_list, dtype=np.int32), diff_word, len(word_list)
+
+
+_worker_word2idx = None
+
+
+def _init_tokenize_worker(word2idx):
+    global _worker_word2idx
+    _worker_word2idx = word2idx
+
+
+def _tokenize_worker(path):
+    return tokenize_file(path, _worker_word2idx)
+
+
+def map_ids(path):
+    """
+    Memory-maps an int32 id file. np.memmap refuses empty files, they give an empty tensor.
+    """
+    if os.path.getsize(path) == 0:
+        return torch.zeros(0, dtype=torch.int32)
+    # copy-on-write mapping: the file is never modified and torch gets a writable array
+    return torch.from_numpy(np.memmap(path, dtype=np.int32, mode='c'))
+
+
 class Corpus(object):
     def __init__(self, params, dictionary):       
         repopath = params['repo_path']
         self.path = f'{repopath}/data'
         authors_no = params['number_of_total_participants']
         self.local_test_perc = params['local_test_perc']
+        self.tokenize_workers = params.get('tokenize_workers', os.cpu_count())
         self.dictionary = dictionary
         self.no_tokens = len(self.dictionary)
         self.authors_no = authors_no
@@ -49,48 +103,88 @@ class Corpus(object):
     def tokenize_train(self, path):
         """
         We return a list of ids per each participant.
+        The files are tokenized in `tokenize_workers` processes, the result does not depend on their number.
         :param path:
         :return:
         """
         files = os.listdir(path)
+        # jupyter creates somehow checkpoints in this folder
+        paths = [f'{path}/{file}' for file in files[:self.authors_no] if 'checkpoint' not in file]
         per_participant_ids = list()
         per_participant_ids_test = list()
         per_participant_different_words = list()
         per_participant_voc_size = list()
-        for file in tqdm(files[:self.authors_no]):
-            # jupyter creates somehow checkpoints in this folder
-            if 'checkpoint' in file:
-                continue
-            new_path=f'{path}/{file}'
-            with open(new_path, 'r') as f:
-                diff_word = 0
-                tokens = 0
-                word_list = list()
-                for line in f:
-                    words = get_word_list(line, self.dictionary)
-                    tokens += len(words)
-                    wordidx = [self.dictionary.word2idx[x] for x in words]
-                    diff_word += sum([i not in word_list for i in wordidx])
-                    word_list.extend(wordidx)
-                ids = torch.LongTensor(word_list)
-                ids_test = torch.LongTensor(word_list[len(word_list)//100*(100-self.local_test_perc):])
-            if len(ids)>=10:
+        if self.tokenize_workers > 1:
+            pool = get_context('fork').Pool(self.tokenize_workers, initializer=_init_tokenize_worker,
+                                            initargs=(self.dictionary.word2idx,))
+            results = pool.imap(_tokenize_worker, paths, chunksize=64)
+        else:
+            pool = None
+            results = (tokenize_file(new_path, self.dictionary.word2idx) for new_path in paths)
+        for word_list, diff_word, tokens in tqdm(results, total=len(paths)):
+            if len(word_list)>=10:
+                ids = torch.from_numpy(word_list).long()
                 per_participant_ids.append(ids)
-                per_participant_ids_test.append(ids_test)
+                per_participant_ids_test.append(ids[len(ids)//100*(100-self.local_test_perc):])
                 per_participant_different_words.append(diff_word)
                 per_participant_voc_size.append(tokens)
+        if pool is not None:
+            pool.close()
+            pool.join()
         return per_participant_ids, per_participant_ids_test, per_participant_different_words, per_participant_voc_size
 
     def tokenize_aux(self, path):
         """Tokenizes a text file."""
         assert os.path.exists(path)
-        # Add words to the dictionary
-        word_list = list()
-        with open(path, 'r') as f:
-            tokens = 0
-            for line in f:
-                words = get_word_list(line, self.dictionary)
-                tokens += len(words)
-                word_list.extend([self.dictionary.word2idx[x] for x in words])
-        ids = torch.LongTensor(word_list)
-        return ids
\ No newline at end of file
+        word_list, _, _ = tokenize_file(path, self.dictionary.word2idx)
+        return torch.from_numpy(word_list).long()
+
+    def save_tokens(self, directory):
+        """
+        Writes the token ids to `directory`: tokens.bin holds the ids of all participants one after the other,
+        offsets.npy where each participant starts, auxiliary.bin the ids of test_data.json.
+        The local test sets are suffixes of the participants' ids and are not stored.
+        """
+        os.makedirs(directory, exist_ok=True)
+        offsets = np.zeros(len(self.train) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(ids) for ids in self.train])
+        tokens = np.memmap(os.path.join(directory, 'tokens.bin'), dtype=np.int32, mode='w+',
+                           shape=(max(int(offsets[-1]), 1),))
+        for start, ids in zip(offsets, self.train):
+            tokens[start:start + len(ids)] = ids.numpy()
+        tokens.flush()
+        del tokens
+        self.auxiliary.numpy().astype(np.int32).tofile(os.path.join(directory, 'auxiliary.bin'))
+        np.save(os.path.join(directory, 'offsets.npy'), offsets)
+        np.save(os.path.join(directory, 'diff_words.npy'), np.asarray(self.diff_words, dtype=np.int64))
+        np.save(os.path.join(directory, 'voc_size.npy'), np.asarray(self.voc_size, dtype=np.int64))
+        # written last, a directory without it is an interrupted write
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump({'no_tokens': self.no_tokens, 'no_participants': len(self.train)}, f)
+
+    @classmethod
+    def load_tokens(cls, params, dictionary, directory):
+        """
+        Reads a corpus written by save_tokens. The ids are memory-mapped, every participant's tensor is an
+        int32 view of tokens.bin, nothing is read from disk until it is used.
+        """
+        with open(os.path.join(directory, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        if meta['no_tokens'] != len(dictionary):
+            raise ValueError(f'token cache {directory} was built with a dictionary of {meta["no_tokens"]} words, '
+                             f'the current one has {len(dictionary)}')
+        corpus = cls.__new__(cls)
+        corpus.path = f"{params['repo_path']}/data"
+        corpus.authors_no = params['number_of_total_participants']
+        corpus.local_test_perc = params['local_test_perc']
+        corpus.dictionary = dictionary
+        corpus.no_tokens = len(dictionary)
+
+        offsets = np.load(os.path.join(directory, 'offsets.npy')).tolist()
+        tokens = map_ids(os.path.join(directory, 'tokens.bin'))
+        corpus.train = [tokens[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+        corpus.test = [ids[len(ids)//100*(100-corpus.local_test_perc):] for ids in corpus.train]
+        corpus.auxiliary = map_ids(os.path.join(directory, 'auxiliary.bin'))
+        corpus.diff_words = np.load(os.path.join(directory, 'diff_words.npy')).tolist()
+        corpus.voc_size = np.load(os.path.join(directory, 'voc_size.npy')).tolist()
+        return corpus
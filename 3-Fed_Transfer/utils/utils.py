@@ -1,3 +1,4 @@
+import math
 import numpy as np
 import random
 import torch
@@ -87,16 +88,37 @@ def fisher_matrix_diag(helper, data_source, target_model, criterion):
     print('time spent on computing fisher:',time.time()-start_time)
     return fisher
 
-def criterion_ewc(global_model, model, fisher, output, targets, criterion, lamb=5000):
-    model_old = deepcopy(global_model)
-    model_old.eval()
-    for param in model_old.parameters():# Freeze the weights
-        param.requires_grad = False
+class EWCState:
+    """
+    Reference parameters and Fisher diagonal of EWC, snapshotted once per adaptation run.
+    Both are kept as flat tensors in named_parameters order, so the penalty is one expression
+    over all parameters instead of a model copy and a loop over layers on every batch.
+    """
+    def __init__(self, global_model, fisher, lamb=5000):
+        named_params = list(global_model.named_parameters())
+        self.reference = torch.cat([p.detach().reshape(-1) for _, p in named_params]).clone()
+        self.fisher = torch.cat([fisher[n].detach().reshape(-1) for n, _ in named_params]).to(self.reference.device)
+        self.lamb = lamb
+
+    @classmethod
+    def load_or_compute(cls, helper, data_source, global_model, criterion, fisher_path):
+        """
+        Fisher diagonal from fisher_path if it exists, otherwise computed once and saved there.
+        """
+        if os.path.exists(fisher_path):
+            fisher = torch.load(fisher_path, map_location=helper.device)
+        else:
+            fisher = fisher_matrix_diag(helper, data_source, global_model, criterion)
+            torch.save(fisher, fisher_path)
+        return cls(global_model, fisher, helper.lamb)
+
+    def penalty(self, model):
+        params = torch.cat([p.reshape(-1) for p in model.parameters()])
+        return self.lamb / 2 * torch.dot(self.fisher, (self.reference - params).pow(2))
+
+def criterion_ewc(ewc, model, output, targets, criterion):
     # Regularization for all previous tasks
-    loss_reg=0
-    for (name,param),(_,param_old) in zip(model.named_parameters(),model_old.named_parameters()):
-        loss_reg+=torch.sum(fisher[name]*(param_old-param).pow(2))/2
-    return criterion(output, targets)+lamb*loss_reg
+    return criterion(output, targets)+ewc.penalty(model)
 
 def criterion_kd(helper, outputs, targets, teacher_outputs):
     """
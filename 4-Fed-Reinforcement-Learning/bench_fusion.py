@@ -0,0 +1,59 @@
+import argparse
+import copy
+import time
+import torch
+from fedformer import FedFormer
+from fusion import EncoderFusion
+
+# time one fusion round of the pairwise FedFormer.fuse loop against EncoderFusion for a growing number of agents
+
+
+def build(num_agents, layer_size, input_size):
+    transformer_layer_config = dict(d_model=layer_size, nhead=4)
+    return [FedFormer(hidden_sizes=[layer_size, layer_size, layer_size], output_size=1, input_size=input_size,
+                      transformer_layer_config=transformer_layer_config, num_layers=1,
+                      agent_index=i, num_agents=num_agents)
+            for i in range(num_agents)]
+
+
+def pairwise_fuse(networks):
+    for k in range(len(networks)):
+        for j in range(k + 1, len(networks)):
+            networks[k].fuse(networks[j])
+
+
+def timed(fuse, networks, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fuse(networks)
+    return (time.perf_counter() - start) / repeat
+
+
+def check(networks):
+    # every agent must see the current local encoder of every other agent
+    for net in networks:
+        for other in networks:
+            for p, q in zip(net.encoders[other.agent_index].parameters(),
+                            other.encoders[other.agent_index].parameters()):
+                assert torch.equal(p, q)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser('FedFormer encoder fusion benchmark')
+    parser.add_argument('--agents', type=str, default='2,4,8,16,32,64')
+    parser.add_argument('--layer_size', type=int, default=64)
+    parser.add_argument('--input_size', type=int, default=43)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--device', type=str, default='cpu')
+    args = parser.parse_args()
+
+    fusion = EncoderFusion()
+    for num_agents in eval('[' + args.agents + ']'):
+        networks = [net.to(args.device) for net in build(num_agents, args.layer_size, args.input_size)]
+        baseline = copy.deepcopy(networks)
+
+        t_pairwise = timed(pairwise_fuse, baseline, args.repeat)
+        t_stacked = timed(fusion.fuse, networks, args.repeat)
+        check(networks)
+        print('agents=%3d: pairwise %9.2f ms, stacked %8.2f ms, speedup %6.1fx'
+              % (num_agents, t_pairwise * 1000, t_stacked * 1000, t_pairwise / t_stacked))
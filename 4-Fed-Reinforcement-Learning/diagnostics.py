@@ -0,0 +1,77 @@
+from collections import OrderedDict
+import torch
+
+
+class DeferredStats:
+    """
+    Running training statistics kept as tensors on the device they were computed on.
+    Nothing is copied to the host until get_diagnostics or get_last is called,
+    so recording a gradient step does not force a device synchronisation.
+    """
+
+    def __init__(self):
+        self.last = OrderedDict()        # name -> last recorded scalar, kept across epochs
+        self.reset()
+
+    def reset(self):
+        self.scalar_sums = OrderedDict() # name -> (sum, count) of the recorded scalars
+        self.moments = OrderedDict()     # name -> [sum, sum of squares] over every recorded element
+        self.extremes = OrderedDict()    # name -> [max, -min] over every recorded element
+        self.counts = OrderedDict()
+
+    def add_scalar(self, name, value):
+        value = value.detach().double().mean() if torch.is_tensor(value) else torch.tensor(float(value), dtype=torch.float64)
+        self.last[name] = value
+        if name in self.scalar_sums:
+            total, count = self.scalar_sums[name]
+            self.scalar_sums[name] = (total + value, count + 1)
+        else:
+            self.scalar_sums[name] = (value, 1)
+
+    def add_distribution(self, name, value):
+        value = value.detach().reshape(-1).double()
+        moments = torch.stack((value.sum(), value.square().sum()))
+        extremes = torch.stack((value.max(), -value.min()))
+        if name in self.moments:
+            self.moments[name] += moments
+            self.extremes[name] = torch.maximum(self.extremes[name], extremes)
+            self.counts[name] += value.numel()
+        else:
+            self.moments[name] = moments
+            self.extremes[name] = extremes
+            self.counts[name] = value.numel()
+
+    def get_last(self):
+        """
+        :return: the scalars of the most recent step, as floats
+        """
+        return OrderedDict(zip(self.last.keys(), self._to_host(list(self.last.values()))))
+
+    def get_diagnostics(self):
+        """
+        :return: epoch averages of the scalars and Mean/Std/Max/Min of the distributions,
+                 named as rlkit's create_stats_ordered_dict names them
+        """
+        stats = OrderedDict()
+        totals = self._to_host([total for total, _ in self.scalar_sums.values()])
+        for (name, (_, count)), total in zip(self.scalar_sums.items(), totals):
+            stats[name] = total / count
+
+        if self.moments:
+            moments = self._to_host(list(self.moments.values()))
+            extremes = self._to_host(list(self.extremes.values()))
+            for name, (total, squares), (maximum, neg_minimum) in zip(self.moments.keys(), moments, extremes):
+                count = self.counts[name]
+                mean = total / count
+                stats[name + ' Mean'] = mean
+                stats[name + ' Std'] = max(squares / count - mean ** 2, 0.) ** 0.5
+                stats[name + ' Max'] = maximum
+                stats[name + ' Min'] = -neg_minimum
+        return stats
+
+    @staticmethod
+    def _to_host(tensors):
+        # one transfer for the whole group instead of one per value
+        if not tensors:
+            return []
+        return torch.stack([t.to(tensors[0].device) for t in tensors]).cpu().tolist()
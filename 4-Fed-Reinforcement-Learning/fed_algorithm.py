@@ -6,6 +6,8 @@ from joblib import Parallel, delayed
 import torch 
 import numpy as np
 from rlkit.core import Logger 
+from fusion import EncoderFusion
+import copy
 
 class FedAlgorithm:
     def __init__(self,
@@ -18,6 +20,7 @@ class FedAlgorithm:
         self.fedFormer = fedFormer
         self.logger = Logger(name='default')
         self.max_jobs_per_gpu=max_jobs_per_gpu
+        self.fusion = EncoderFusion()
 
     def train(self, start_epoch=0):
      
@@ -30,11 +33,7 @@ class FedAlgorithm:
 
             self.logger.log("Epoch {} finished".format(epoch), with_timestamp=True)
             if self.fedFormer: 
-                for k in tqdm.tqdm(range(len(self.algorithms)), desc='fusing'):
-                    curr = self.algorithms[k]
-                    for j in range(k + 1, len(self.algorithms)):
-                        other = self.algorithms[j]
-                        curr.fuse(other)
+                self.fusion.fuse_algorithms(self.algorithms)
             
             else:
                 qf1 = []
@@ -88,9 +87,10 @@ class FedAlgorithm:
             target_qf1 = networks[2].get_encoders()
             target_qf2 = networks[3].get_encoders()
 
+            # fused encoders are views of the shared fusion buffer, copy them so only their own weights are saved
             for i in range(len(qf1)):
-                torch.save(qf1[i], f'./networks/qf1/encoder-{i}.pt')
-                torch.save(qf2[i], f'./networks/qf2/encoder-{i}.pt')
+                torch.save(copy.deepcopy(qf1[i]), f'./networks/qf1/encoder-{i}.pt')
+                torch.save(copy.deepcopy(qf2[i]), f'./networks/qf2/encoder-{i}.pt')
                 torch.save(target_qf1[i], f'./networks/target_qf1/encoder-{i}.pt')
                 torch.save(target_qf2[i], f'./networks/target_qf2/encoder-{i}.pt')
 
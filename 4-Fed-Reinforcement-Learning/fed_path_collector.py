@@ -2,82 +2,150 @@ from rlkit.samplers.data_collector import MdpPathCollector
 from rlkit.samplers.rollout_functions import rollout
 import numpy as np
 from rlkit.envs.wrappers import NormalizedBoxEnv
-import metaworld 
+import metaworld
 
 BENCHMARK = metaworld.MT10()
+
+
 class FedPathCollector(MdpPathCollector):
     def __init__(
         self,
         policy,
         task_list,
         task_name,
+        num_envs=1,
         max_num_epoch_paths_saved=None,
         render=False,
         render_kwargs=None,
         rollout_fn=rollout,
         save_env_in_snapshot=True):
-        
-        super().__init__(None, 
-            policy, 
-            max_num_epoch_paths_saved, 
+
+        super().__init__(None,
+            policy,
+            max_num_epoch_paths_saved,
             render, render_kwargs,
             rollout_fn,
             save_env_in_snapshot)
-        
-        self.env_cls = BENCHMARK.train_classes[task_name]()
-        
+
+        # the environments are built once and reused for every path, one path per env at a time
+        self.envs = [NormalizedBoxEnv(BENCHMARK.train_classes[task_name]()) for _ in range(num_envs)]
+        self.env_cls = self.envs[0].wrapped_env
+        self.obs_dim = self.envs[0].observation_space.low.size
+        self.action_dim = self.envs[0].action_space.low.size
+
         self.task_list = task_list
         self.task_order = np.arange(len(self.task_list))
-        
+
         self._next_order_index = 0
         self._shuffle_tasks()
 
     def _shuffle_tasks(self):
         """Reshuffles the task orders."""
         np.random.shuffle(self.task_order)
-        
-    def collect_new_paths(self, max_path_length, num_steps, discard_incomplete_paths, with_replacement=False):
+
+    def collect_new_paths(self, max_path_length, num_steps, discard_incomplete_paths, with_replacement=False,
+                          replay_buffer=None):
+        """
+        Roll out paths on all envs at once with one batched policy call per step.
+        Paths are split and ordered over tasks exactly as the one-env-at-a-time loop did.
+        :param replay_buffer: if given, every kept path is written straight into it
+        """
+        num_envs = len(self.envs)
+        obs_buf = np.zeros((num_envs, max_path_length, self.obs_dim))
+        next_obs_buf = np.zeros((num_envs, max_path_length, self.obs_dim))
+        act_buf = np.zeros((num_envs, max_path_length, self.action_dim))
+        rew_buf = np.zeros((num_envs, max_path_length, 1))
+        term_buf = np.zeros((num_envs, max_path_length, 1), dtype=bool)
+        done_buf = np.zeros((num_envs, max_path_length), dtype=bool)
+        env_infos = [[] for _ in range(num_envs)]
+
         paths = []
         num_steps_collected = 0
+        num_steps_allocated = 0
         order_index = self._next_order_index
-        while num_steps_collected < num_steps:
-            curr_task = self.task_list[self.task_order[order_index]]
-            self.env_cls.set_task(curr_task)
+        path_limit = [0] * num_envs
+        path_len = [0] * num_envs
+        obs = [None] * num_envs
+        active = []
+        stop = False
+        self._policy.reset()
 
-            env = NormalizedBoxEnv(self.env_cls) 
-
-            max_path_length_this_loop = min(  # Do not go over num_steps
+        def start_path(i):
+            nonlocal order_index, num_steps_allocated
+            curr_task = self.task_list[self.task_order[order_index]]
+            self.envs[i].wrapped_env.set_task(curr_task)
+            obs[i] = self.envs[i].reset()
+            path_limit[i] = min(  # Do not go over num_steps
                 max_path_length,
-                num_steps - num_steps_collected,
+                num_steps - num_steps_allocated,
             )
-            path = self._rollout_fn(
-                env,
-                self._policy,
-                max_path_length=max_path_length_this_loop,
-                render=self._render,
-                render_kwargs=self._render_kwargs,
-            )
-        
-            path_len = len(path['actions'])
-            if (
-                    path_len != max_path_length
-                    and not path['dones'][-1]
-                    and discard_incomplete_paths
-            ):
-                break
-            num_steps_collected += path_len
-            paths.append(path)
+            num_steps_allocated += path_limit[i]
+            path_len[i] = 0
+            env_infos[i] = []
 
             if with_replacement:
                 order_index = np.random.randint(0, len(self.task_list))
             else:
-                order_index += 1 
+                order_index += 1
                 if order_index >= len(self.task_list):
                     order_index = 0
                     self._shuffle_tasks()
 
+        for i in range(num_envs):
+            if num_steps_allocated >= num_steps:
+                break
+            start_path(i)
+            active.append(i)
+
+        while active:
+            actions = self._policy.get_actions(np.stack([obs[i] for i in active]))
+
+            still_active = []
+            for slot, i in enumerate(active):
+                t = path_len[i]
+                next_o, r, d, env_info = self.envs[i].step(actions[slot])
+                obs_buf[i, t] = obs[i]
+                act_buf[i, t] = actions[slot]
+                rew_buf[i, t] = r
+                next_obs_buf[i, t] = next_o
+                term_buf[i, t] = d and not env_info.get('TimeLimit.truncated', False)
+                done_buf[i, t] = d
+                env_infos[i].append(env_info)
+                obs[i] = next_o
+                path_len[i] = t = t + 1
+
+                if not d and t < path_limit[i]:
+                    still_active.append(i)
+                    continue
+
+                # the path is over, give the unused part of its budget back
+                num_steps_allocated -= path_limit[i] - t
+                if t != max_path_length and not d and discard_incomplete_paths:
+                    stop = True
+                    continue
+                num_steps_collected += t
+                path = dict(
+                    observations=obs_buf[i, :t].copy(),
+                    actions=act_buf[i, :t].copy(),
+                    rewards=rew_buf[i, :t].copy(),
+                    next_observations=next_obs_buf[i, :t].copy(),
+                    terminals=term_buf[i, :t].copy(),
+                    dones=done_buf[i, :t].copy(),
+                    agent_infos=[{}] * t,
+                    env_infos=env_infos[i],
+                )
+                if replay_buffer is not None:
+                    # a BatchEnvReplayBuffer stores the whole path at once
+                    replay_buffer.add_path(path)
+                paths.append(path)
+
+                if not stop and num_steps_allocated < num_steps:
+                    start_path(i)
+                    still_active.append(i)
+            active = still_active
+
         self._next_order_index = order_index
-        
+
         self._num_paths_total += len(paths)
         self._num_steps_total += num_steps_collected
         self._epoch_paths.extend(paths)
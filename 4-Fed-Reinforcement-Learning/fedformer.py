@@ -63,15 +63,30 @@ class FedFormer(PyTorchModule):
         self.encoders[self.agent_index].requires_grad_(True)
            
 
+    def encode(self, x):
+        """
+        Run every agent's encoder on x at once, one batched matmul per layer.
+        Returns the encodings with shape [num_agents, batch, hidden].
+        """
+        first = self.encoders[0]
+        if first.layer_norm:
+            return torch.stack([net(x) for net in self.encoders], dim=0)
+
+        h = x.unsqueeze(0).expand(len(self.encoders), -1, -1)
+        layers = list(zip(*[list(net.fcs) + [net.last_fc] for net in self.encoders]))
+        for i, fcs in enumerate(layers):
+            weight = torch.stack([fc.weight for fc in fcs], dim=0)
+            bias = torch.stack([fc.bias for fc in fcs], dim=0)
+            h = torch.baddbmm(bias.unsqueeze(1), h, weight.transpose(1, 2))
+            h = first.hidden_activation(h) if i < len(layers) - 1 else first.output_activation(h)
+        return h
+
     def forward(self, obs, actions):
         x = torch.cat((obs, actions), dim=1)  
    
-        encodings = [torch.tile(self.cls(torch.tensor(1, dtype=torch.int).to('cuda:0')), (x.shape[0], 1))]
-        encodings += [net(x) for net in self.encoders]
-
-        encodings = torch.stack(encodings, dim=0)
-        indices = torch.arange(0, self.num_agents + 1, dtype=torch.int).to('cuda:0') # I hope this works!
-        encodings_transformer = encodings + torch.tile(self.positional_encoding(indices).unsqueeze(1), (1, x.shape[0], 1))
+        cls = self.cls.weight[1].expand(1, x.shape[0], -1)
+        encodings = torch.cat((cls, self.encode(x)), dim=0)
+        encodings_transformer = encodings + self.positional_encoding.weight.unsqueeze(1)
 
         transformed = self.transformer(encodings_transformer)  
         
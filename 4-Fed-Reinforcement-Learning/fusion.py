@@ -0,0 +1,57 @@
+import torch
+
+
+class EncoderFusion:
+    """
+    Shares the local encoder of every agent with all other agents once per round.
+
+    The local encoders are flattened into one stacked buffer of shape [num_agents, num_params],
+    then the frozen encoder slots of every FedFormer are pointed at views of that buffer.
+    A round costs one copy per agent (plus one per extra device) instead of a deepcopy per pair of agents.
+    """
+
+    def __init__(self, network_names=('qf1', 'qf2')):
+        self.network_names = network_names
+
+    def gather(self, networks):
+        """
+        :param networks: the FedFormer of every agent for one Q-function
+        :return: stacked buffer, row k holds the flattened local encoder of networks[k]
+        """
+        local = [net.encoders[net.agent_index] for net in networks]
+        first = list(local[0].parameters())
+        buffer = torch.empty(len(local), sum(p.numel() for p in first), dtype=first[0].dtype, device=first[0].device)
+        with torch.no_grad():
+            for row, encoder in zip(buffer, local):
+                start = 0
+                for p in encoder.parameters():
+                    row[start:start + p.numel()].copy_(p.reshape(-1))
+                    start += p.numel()
+        return buffer
+
+    def scatter(self, networks, buffer):
+        """
+        Point encoders[j] of every network at row j of the buffer, except for its own local encoder.
+        """
+        agent_indices = [net.agent_index for net in networks]
+        per_device = {buffer.device: buffer}
+        for net in networks:
+            device = next(net.encoders[net.agent_index].parameters()).device
+            if device not in per_device:
+                per_device[device] = buffer.to(device)
+            stacked = per_device[device]
+
+            for row, index in zip(stacked, agent_indices):
+                if index == net.agent_index:
+                    continue
+                start = 0
+                for p in net.encoders[index].parameters():
+                    p.data = row[start:start + p.numel()].view_as(p)
+                    start += p.numel()
+
+    def fuse(self, networks):
+        self.scatter(networks, self.gather(networks))
+
+    def fuse_algorithms(self, algorithms):
+        for name in self.network_names:
+            self.fuse([getattr(algorithm.trainer, name) for algorithm in algorithms])
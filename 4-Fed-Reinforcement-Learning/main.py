@@ -1,6 +1,5 @@
 import metaworld
 import rlkit.torch.pytorch_util as ptu
-from rlkit.data_management.env_replay_buffer import EnvReplayBuffer
 from rlkit.envs.wrappers import NormalizedBoxEnv
 from rlkit.launchers.launcher_util import setup_logger
 from rlkit.samplers.data_collector import MdpPathCollector
@@ -10,6 +9,7 @@ from rlkit.torch.networks import ConcatMlp
 import numpy as np 
 import torch.nn as nn
 from sac_algorithm import TorchBatchRLAlgorithm
+from replay_buffer import BatchEnvReplayBuffer
 from sac_trainer import SACTrainer
 from fed_algorithm import FedAlgorithm
 from fedformer import FedFormer
@@ -123,15 +123,17 @@ def experiment(variant):
         eval_path_collector = FedPathCollector(
             policy=policy,
             task_list=tasks_test,
-            task_name=variant['task']
+            task_name=variant['task'],
+            num_envs=variant['num_envs']
         )
         expl_path_collector = FedPathCollector(
             policy=policy,
             task_list=tasks_train,
-            task_name=variant['task']
+            task_name=variant['task'],
+            num_envs=variant['num_envs']
         )
 
-        replay_buffer = EnvReplayBuffer(
+        replay_buffer = BatchEnvReplayBuffer(
             variant['replay_buffer_size'],
             expl_env,
         )
@@ -180,6 +182,7 @@ def main(task, seed, agents):
         num_jobs_per_gpu=2, # number of agents to train in parallel per gpu
         transformer_num_layers=2, # number of transformer encoder layers to use
         num_agents=agents, # number of federation agents to initialize
+        num_envs=5, # number of persistent environments each path collector steps at once
         transformer_layer_kwargs=dict(
             d_model=400, # hidden size for each transformer layer
             nhead=4 # number of attention heads to initialize
@@ -0,0 +1,28 @@
+import numpy as np
+from rlkit.data_management.env_replay_buffer import EnvReplayBuffer
+
+
+class BatchEnvReplayBuffer(EnvReplayBuffer):
+    """
+    EnvReplayBuffer that stores a whole path with one slice assignment per field,
+    instead of add_path's add_sample call per step. Actions are stored as given, which is what
+    EnvReplayBuffer does for the continuous action spaces of the Meta-World tasks.
+    """
+
+    def add_samples(self, observations, actions, rewards, next_observations, terminals, env_infos):
+        n = len(actions)
+        idx = (self._top + np.arange(n)) % self._max_replay_buffer_size
+        self._observations[idx] = observations
+        self._actions[idx] = actions
+        self._rewards[idx] = np.asarray(rewards).reshape(n, -1)
+        self._next_obs[idx] = next_observations
+        self._terminals[idx] = np.asarray(terminals).reshape(n, -1)
+        for key in self._env_info_keys:
+            self._env_infos[key][idx] = np.array([info[key] for info in env_infos]).reshape(n, -1)
+        self._top = (self._top + n) % self._max_replay_buffer_size
+        self._size = min(self._size + n, self._max_replay_buffer_size)
+
+    def add_path(self, path):
+        self.add_samples(path['observations'], path['actions'], path['rewards'],
+                         path['next_observations'], path['terminals'], path['env_infos'])
+        self.terminate_episode()
@@ -94,9 +94,8 @@ class BatchRLAlgorithm(BaseRLAlgorithm, metaclass=abc.ABCMeta):
                 self.max_path_length,
                 self.min_num_steps_before_training,
                 discard_incomplete_paths=False,
+                replay_buffer=None if offline_rl else self.replay_buffer,
             )
-            if not offline_rl:
-                self.replay_buffer.add_paths(init_expl_paths)
             self.expl_data_collector.end_epoch(-1)
 
         self.eval_data_collector.collect_new_paths(
@@ -111,13 +110,11 @@ class BatchRLAlgorithm(BaseRLAlgorithm, metaclass=abc.ABCMeta):
                 self.max_path_length,
                 self.num_expl_steps_per_train_loop,
                 discard_incomplete_paths=False,
+                replay_buffer=None if offline_rl else self.replay_buffer,
             )
+            # the collector writes the new paths into the replay buffer as they finish
             gt.stamp(f'{self.name} - exploration sampling', unique=False)
 
-            if not offline_rl:
-                self.replay_buffer.add_paths(new_expl_paths)
-            gt.stamp(f'{self.name} - data storing', unique=False)
-
             self.training_mode(True)
             for itr in tqdm.tqdm(range(self.num_trains_per_train_loop), desc='trains per train loop'):
                 train_data = self.replay_buffer.random_batch(self.batch_size)
@@ -8,10 +8,9 @@ from rlkit.core.loss import LossFunction, LossStatistics
 from torch import nn as nn
 
 import rlkit.torch.pytorch_util as ptu
-from rlkit.core.eval_util import create_stats_ordered_dict
 from rlkit.torch.torch_rl_algorithm import TorchTrainer
-from rlkit.core.logging import add_prefix
 import gtimer as gt
+from diagnostics import DeferredStats
 
 SACLosses = namedtuple(
     'SACLosses',
@@ -43,6 +42,7 @@ class SACTrainer(TorchTrainer, LossFunction):
 
             use_automatic_entropy_tuning=True,
             target_entropy=None,
+            full_statistics=True,
     ):
         super().__init__()
         self.env = env
@@ -91,8 +91,8 @@ class SACTrainer(TorchTrainer, LossFunction):
         self.discount = discount
         self.reward_scale = reward_scale
         self._n_train_steps_total = 0
-        self._need_to_update_eval_statistics = True
-        self.eval_statistics = OrderedDict()
+        self.eval_statistics = DeferredStats()
+        self.full_statistics = full_statistics
     
     def fuse(self, other):
         self.qf1.fuse(other.qf1)
@@ -102,9 +102,8 @@ class SACTrainer(TorchTrainer, LossFunction):
         gt.blank_stamp()
         losses, stats = self.compute_loss(
             batch,
-            skip_statistics=not self._need_to_update_eval_statistics,
+            skip_statistics=not self.full_statistics,
         )
-        self.last_stats = stats
         """
         Update networks
         """
@@ -128,10 +127,6 @@ class SACTrainer(TorchTrainer, LossFunction):
         self._n_train_steps_total += 1
 
         self.try_update_target_networks()
-        if self._need_to_update_eval_statistics:
-            self.eval_statistics = stats
-            # Compute statistics using only one batch per epoch
-            self._need_to_update_eval_statistics = False
         gt.stamp('sac training', unique=False)
 
     def try_update_target_networks(self):
@@ -197,51 +192,25 @@ class SACTrainer(TorchTrainer, LossFunction):
 
         """
         Save some statistics for eval
+        They stay on the device until the logger asks for them, see DeferredStats
         """
-        eval_statistics = OrderedDict()
-        #if not skip_statistics:
-        eval_statistics['QF1 Loss'] = np.mean(ptu.get_numpy(qf1_loss))
-        eval_statistics['Reward'] = np.mean(ptu.get_numpy(rewards))
-        eval_statistics['QF2 Loss'] = np.mean(ptu.get_numpy(qf2_loss))
-        eval_statistics['Policy Loss'] = np.mean(ptu.get_numpy(
-            policy_loss
-        ))
-        eval_statistics.update(create_stats_ordered_dict(
-            'Q1 Predictions',
-            ptu.get_numpy(q1_pred),
-        ))
-        eval_statistics.update(create_stats_ordered_dict(
-            'Q2 Predictions',
-            ptu.get_numpy(q2_pred),
-        ))
-        eval_statistics.update(create_stats_ordered_dict(
-            'Q Targets',
-            ptu.get_numpy(q_target),
-        ))
-        eval_statistics.update(create_stats_ordered_dict(
-            'Log Pis',
-            ptu.get_numpy(log_pi),
-        ))
-            
-        stats = OrderedDict()
-        stats.update(create_stats_ordered_dict(
-            'mean',
-            ptu.get_numpy(dist.mean),
-        ))
-        stats.update(create_stats_ordered_dict(
-            'normal/std',
-            ptu.get_numpy(dist.stddev)
-        ))
-        stats.update(create_stats_ordered_dict(
-            'normal/log_std',
-            ptu.get_numpy(torch.log(dist.stddev)),
-        ))
-    
-        policy_statistics = add_prefix(stats, "policy/")
-        eval_statistics.update(policy_statistics)
+        eval_statistics = self.eval_statistics
+        # the losses and reward are always recorded, FedAlgorithm weights the agents with them
+        eval_statistics.add_scalar('QF1 Loss', qf1_loss)
+        eval_statistics.add_scalar('Reward', rewards)
+        eval_statistics.add_scalar('QF2 Loss', qf2_loss)
+        eval_statistics.add_scalar('Policy Loss', policy_loss)
+        if not skip_statistics:
+            eval_statistics.add_distribution('Q1 Predictions', q1_pred)
+            eval_statistics.add_distribution('Q2 Predictions', q2_pred)
+            eval_statistics.add_distribution('Q Targets', q_target)
+            eval_statistics.add_distribution('Log Pis', log_pi)
+            eval_statistics.add_distribution('policy/mean', dist.mean)
+            eval_statistics.add_distribution('policy/normal/std', dist.stddev)
+            eval_statistics.add_distribution('policy/normal/log_std', torch.log(dist.stddev))
         if self.use_automatic_entropy_tuning:
-            eval_statistics['Alpha'] = alpha.item()
-            eval_statistics['Alpha Loss'] = alpha_loss.item()
+            eval_statistics.add_scalar('Alpha', alpha)
+            eval_statistics.add_scalar('Alpha Loss', alpha_loss)
 
         loss = SACLosses(
             policy_loss=policy_loss,
@@ -254,14 +223,14 @@ class SACTrainer(TorchTrainer, LossFunction):
 
     def get_diagnostics(self):
         stats = super().get_diagnostics()
-        stats.update(self.eval_statistics)
+        stats.update(self.eval_statistics.get_diagnostics())
         return stats
 
     def end_epoch(self, epoch):
-        self._need_to_update_eval_statistics = True
+        self.eval_statistics.reset()
     
     def get_stats(self):
-        return self.last_stats
+        return self.eval_statistics.get_last()
 
     def set_networks(self, networks):
         self.qf1 = networks[0]
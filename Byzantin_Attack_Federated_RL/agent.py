@@ -2,15 +2,14 @@ import os
 import numpy as np
 import torch
 import torch.optim as optim
-from torch.multiprocessing import Pool
 from tqdm import tqdm
 from sklearn import metrics
 from matplotlib import pyplot as plt
-from itertools import repeat
 from scipy.interpolate import Rbf
 import scipy.stats as st
 
 from worker import Worker
+from worker_pool import PersistentWorkerPool
 from utils import torch_load_cpu, get_inner_model, env_wrapper
 
 class Memory:
@@ -36,20 +35,6 @@ def euclidean_dist(x, y):
     dist = dist.sqrt()
     return dist
 
-def worker_run(worker, param, opts, Batch_size, seed):
-    
-    # distribute current parameters
-    worker.load_param_from_master(param)
-    worker.env.seed(seed)
-    
-    # get returned gradients and info from all agents        
-    out = worker.train_one_epoch(Batch_size, opts.device, opts.do_sample_for_training)
-    
-    # store all values
-    return out
-    
-
-
 class Agent:
     
     def __init__(self, opts):
@@ -109,9 +94,14 @@ class Agent:
             # figure out the optimizer
             self.optimizer = optim.Adam(self.master.logits_net.parameters(), lr = opts.lr_model)
         
-        self.pool = Pool(self.world_size)
+        # long-lived worker processes, reading the policy from shared memory
+        self.pool = PersistentWorkerPool(self.workers, self.master, opts)
         self.memory = Memory()
     
+    def close(self):
+        # stop the worker processes
+        self.pool.close()
+    
     def load(self, load_path):
         assert load_path is not None
         load_data = torch_load_cpu(load_path)
@@ -194,13 +184,8 @@ class Agent:
                 Batch_size = opts.B
         
             seeds = np.random.randint(1,100000, self.world_size).tolist()
-            args = zip(self.workers,
-                       repeat(param),
-                       repeat(opts),
-                       repeat(Batch_size),
-                       seeds)
             
-            results = self.pool.starmap(worker_run, args)
+            results = self.pool.run(param, Batch_size, seeds)
 
             #  collect the gradient(for training), loss(for logging only), returns(for logging only), and epi_length(for logging only) from workers         
             for out in tqdm(results, desc='Worker node'):
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+import argparse
+import torch
+import numpy as np
+
+from worker import Worker
+from options import get_options
+
+# measure the environment steps per second of Worker.collect_experience_for_training for different num_envs
+def bench(opts, num_envs, repeat):
+    opts.num_envs = num_envs
+    worker = Worker(id = 0, is_Byzantine = False, env_name = opts.env_name, gamma = opts.gamma,
+                    hidden_units = opts.hidden_units, activation = opts.activation,
+                    output_activation = opts.output_activation, max_epi_len = opts.max_epi_len, opts = opts)
+    worker.seed(opts.seed)
+    steps = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        _, _, _, batch_lens = worker.collect_experience_for_training(opts.B, opts.device, sample = True)
+        steps += sum(batch_lens)
+    return steps / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser('rollout benchmark')
+    parser.add_argument('--num_envs', type=str, default='1,4,16')
+    parser.add_argument('--repeat', type=int, default=3)
+    args, rest = parser.parse_known_args()
+    
+    opts = get_options(rest + ['--no_saving', '--no_tb'])
+    opts.device = torch.device("cpu")
+    torch.manual_seed(opts.seed)
+    np.random.seed(opts.seed)
+    
+    for num_envs in eval('[' + args.num_envs + ']'):
+        print('%s num_envs=%3d: %10.1f steps/sec' % (opts.env_name, num_envs, bench(opts, num_envs, args.repeat)))
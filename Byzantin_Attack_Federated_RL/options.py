@@ -59,6 +59,8 @@ def get_options(args=None):
                         help='Number of episoid used for reporting validation performance')
     parser.add_argument('--val_max_steps', type=int, default=1000, 
                         help='Maximum trajectory length used for reporting validation performance')
+    parser.add_argument('--num_envs', type=int, default=16, 
+                        help='Number of environments each worker steps at once when collecting experience')
     
 
     # Load pre-trained modelss
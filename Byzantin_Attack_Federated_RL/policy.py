@@ -90,6 +90,26 @@ class MlpPolicy(nn.Module):
         
         return action.item(), policy.log_prob(action)
 
+    def forward_batch(self, obs, sample = True, fixed_action = None):
+        """
+        :param obs: observations of a batch of envs, shape [n, obs_dim]
+        :return: actions of shape [n] (numpy), log_p(actions) of shape [n]
+        """
+        
+        # forward pass the policy net for all envs at once
+        logits = self.logits_net(obs)
+        
+        # the categorical distribution written out, building a validated Categorical costs more than the net
+        logp_all = torch.log_softmax(logits, -1)
+        if fixed_action is not None:
+            action = torch.as_tensor(fixed_action, device = obs.device)
+        elif sample:
+            action = torch.multinomial(torch.softmax(logits.detach(), -1), 1, True).squeeze(-1)
+        else:
+            action = logits.detach().argmax(-1)
+        
+        return action.cpu().numpy(), logp_all.gather(-1, action.long().unsqueeze(-1)).squeeze(-1)
+
 class DiagonalGaussianMlpPolicy(nn.Module):
     def __init__(self,
                  sizes,
@@ -163,4 +183,29 @@ class DiagonalGaussianMlpPolicy(nn.Module):
         ll[ll < -1e5] = -1e5
         
         
-        return action.numpy(), ll.sum()
\ No newline at end of file
+        return action.numpy(), ll.sum()
+
+    def forward_batch(self, obs, sample = True, fixed_action = None):
+        """
+        :param obs: observations of a batch of envs, shape [n, obs_dim]
+        :return: actions of shape [n, act_dim] (numpy), log_p(actions) of shape [n]
+        """
+        
+        # forward pass the policy net for all envs at once
+        logits = self.logits_net(obs)
+        mu = torch.tanh(self.mu_net(logits)) * self.geer
+        sigma = torch.tanh(torch.clamp(self.log_sigma_net(logits), self.LOG_SIGMA_MIN, self.LOG_SIGMA_MAX).exp())
+        policy = Normal(mu, sigma, validate_args = False)
+        
+        if fixed_action is not None:
+            action = torch.as_tensor(fixed_action, device = obs.device)
+        elif sample:
+            action = policy.sample()
+        else:
+            action = mu.detach()
+        
+        # avoid NaN
+        ll = policy.log_prob(action)
+        ll[ll < -1e5] = -1e5
+        
+        return action.cpu().numpy(), ll.sum(-1)
\ No newline at end of file
@@ -0,0 +1,158 @@
+import torch
+import numpy as np
+import gym
+from gym.spaces import Discrete
+from utils import env_wrapper
+
+
+def discount_cumsum(rews, gamma, out):
+    # one reverse pass: out[t] = sum_t'>=t gamma^(t'-t) * rews[t']
+    R = 0.
+    for t in range(len(rews) - 1, -1, -1):
+        R = rews[t] + gamma * R
+        out[t] = R
+    return out
+
+
+class RolloutEngine:
+
+    def __init__(self,
+                 env_name,
+                 gamma,
+                 max_epi_len,
+                 num_envs = 1,
+                 envs = None
+                 ):
+
+        # setup
+        self.env_name = env_name
+        self.gamma = gamma
+        self.max_epi_len = max_epi_len
+
+        # make a batch of environments, reuse the given ones if any
+        self.envs = list(envs) if envs is not None else []
+        while len(self.envs) < num_envs:
+            self.envs.append(gym.make(env_name))
+        self.num_envs = len(self.envs)
+        self.is_discrete = isinstance(self.envs[0].action_space, Discrete)
+
+        # preallocated per-env buffers for the observations, rewards and step indices of the running episodes
+        buf_len = max(max_epi_len, 1)
+        self.obs_buf = np.zeros((self.num_envs,) + self.envs[0].observation_space.shape, dtype=np.float32)
+        self.rew_buf = np.zeros((self.num_envs, buf_len), dtype=np.float64)
+        self.step_idx_buf = np.zeros((self.num_envs, buf_len), dtype=np.int64)
+        self.ret_buf = np.zeros(buf_len, dtype=np.float64)
+
+    def seed(self, seed):
+        for i, env in enumerate(self.envs):
+            env.seed(seed + i)
+
+    def reset_env(self, i, obs):
+        obs[i] = self.envs[i].reset()
+        self.obs_buf[i] = env_wrapper(self.env_name, obs[i])
+
+    def collect(self, policy, B, device, record = False, sample = True, attack_type = None):
+        """
+        Sample B episodes with the batched policy, stepping up to num_envs environments at once.
+        :param attack_type: the attack simulated by a Byzantine worker, None for a good worker
+        :return: same as Worker.collect_experience_for_training
+        """
+        batch_weights = []      # for R(tau) weighting in policy gradient
+        batch_rets = []         # for measuring episode returns
+        batch_lens = []         # for measuring episode lengths
+        batch_step_idx = []     # indices of each episode's steps in the concatenated step_obs/step_acts
+        step_obs = []           # batched policy input of each step
+        step_acts = []          # batched actions of each step
+        batch_states = []
+        batch_actions = []
+
+        # start one episode per env, at most B in total; per-env state is indexed by env
+        active = list(range(min(self.num_envs, B)))
+        obs = [None] * self.num_envs        # raw observations, obs_buf holds them wrapped for the policy
+        ep_len = [0] * self.num_envs
+        ep_states = [[] for _ in range(self.num_envs)]
+        ep_actions = [[] for _ in range(self.num_envs)]
+        for i in active:
+            self.reset_env(i, obs)
+        started = len(active)
+        offset = 0
+
+        # simulate random-action attacker if needed
+        if attack_type == 'random-action':
+            act_shape = () if self.is_discrete else self.envs[0].action_space.shape
+            fixed_action = np.zeros((self.num_envs,) + act_shape, dtype=np.int64 if self.is_discrete else np.float32)
+        else:
+            fixed_action = None
+
+        while active:
+            # one batched forward for all running envs, without autograd: the log_probs are computed
+            # for all steps at once after the rollout
+            obs_batch = torch.as_tensor(self.obs_buf[active]).to(device)
+            with torch.no_grad():
+                act, _ = policy.forward_batch(obs_batch, sample = sample,
+                                              fixed_action = None if fixed_action is None else fixed_action[:len(active)])
+            step_obs.append(obs_batch)
+            step_acts.append(act)
+            if self.is_discrete:
+                act = act.tolist()
+
+            still_active = []
+            for slot, i in enumerate(active):
+                a = act[slot]
+                if record:
+                    ep_states[i].append(obs[i])
+                    ep_actions[i].append(a)
+                obs[i], rew, done, _ = self.envs[i].step(a)
+                self.obs_buf[i] = env_wrapper(self.env_name, obs[i])
+
+                # simulate reward-flipping attacker if needed
+                if attack_type == 'reward-flipping':
+                    rew = - rew
+
+                L = ep_len[i]
+                self.rew_buf[i, L] = rew
+                self.step_idx_buf[i, L] = offset + slot
+                L += 1
+                ep_len[i] = L
+
+                if done or L >= self.max_epi_len:
+                    rews = self.rew_buf[i, :L]
+                    batch_rets.append(rews.sum())
+                    batch_lens.append(L)
+
+                    # simulate random-reward attacker if needed
+                    if attack_type == 'random-reward':
+                        np.random.shuffle(rews)
+                    returns = discount_cumsum(rews, self.gamma, self.ret_buf[:L])
+
+                    # return whitening
+                    batch_weights.append((returns - returns.mean()) / (returns.std(ddof = 1) + 1e-20))
+                    batch_step_idx.append(self.step_idx_buf[i, :L].copy())
+                    if record:
+                        batch_states += ep_states[i]
+                        batch_actions += ep_actions[i]
+                        ep_states[i], ep_actions[i] = [], []
+
+                    # start a new episode on this env if more are needed
+                    if started < B:
+                        started += 1
+                        self.reset_env(i, obs)
+                        ep_len[i] = 0
+                        still_active.append(i)
+                else:
+                    still_active.append(i)
+
+            offset += len(active)
+            active = still_active
+
+        # make torch tensor
+        weights = torch.as_tensor(np.concatenate(batch_weights), dtype = torch.float32).to(device)
+        # log_prob of every step in episode order, in one forward that autograd records
+        step_idx = np.concatenate(batch_step_idx)
+        _, logp = policy.forward_batch(torch.cat(step_obs)[torch.as_tensor(step_idx, device = step_obs[0].device)],
+                                       fixed_action = np.concatenate(step_acts)[step_idx])
+
+        if record:
+            return weights, logp, batch_rets, batch_lens, batch_states, batch_actions
+        else:
+            return weights, logp, batch_rets, batch_lens
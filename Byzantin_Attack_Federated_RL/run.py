@@ -43,45 +43,48 @@ def run(opts):
     # Figure out the RL
     agent = Agent(opts)
     
-    # Do validation only
-    if opts.eval_only:
-        # Set the random seed
-        torch.manual_seed(opts.seed)
-        np.random.seed(opts.seed)
+    try:
+        # Do validation only
+        if opts.eval_only:
+            # Set the random seed
+            torch.manual_seed(opts.seed)
+            np.random.seed(opts.seed)
         
-        # Load data from load_path
-        if opts.load_path is not None:
-            agent.load(opts.load_path)
+            # Load data from load_path
+            if opts.load_path is not None:
+                agent.load(opts.load_path)
         
-        agent.start_validating(tb_writer, 0, opts.val_max_steps, opts.render, mode = opts.mode)
+            agent.start_validating(tb_writer, 0, opts.val_max_steps, opts.render, mode = opts.mode)
         
-    else:
-        for run_id in opts.seeds:
-            # Set the random seed
-            torch.manual_seed(run_id)
-            np.random.seed(run_id)
+        else:
+            for run_id in opts.seeds:
+                # Set the random seed
+                torch.manual_seed(run_id)
+                np.random.seed(run_id)
             
-            nn_parms_worker = Worker(
-                id = 0,
-                is_Byzantine = False,
-                env_name = opts.env_name,
-                gamma = opts.gamma,
-                hidden_units = opts.hidden_units, 
-                activation = opts.activation, 
-                output_activation = opts.output_activation,
-                max_epi_len = opts.max_epi_len,
-                opts = opts
-            ).to(opts.device)
+                nn_parms_worker = Worker(
+                    id = 0,
+                    is_Byzantine = False,
+                    env_name = opts.env_name,
+                    gamma = opts.gamma,
+                    hidden_units = opts.hidden_units, 
+                    activation = opts.activation, 
+                    output_activation = opts.output_activation,
+                    max_epi_len = opts.max_epi_len,
+                    opts = opts
+                ).to(opts.device)
             
-            # Load data from random policy
-            model_actor = get_inner_model(agent.master.logits_net)
-            model_actor.load_state_dict({**model_actor.state_dict(), **get_inner_model(nn_parms_worker.logits_net).state_dict()})
+                # Load data from random policy
+                model_actor = get_inner_model(agent.master.logits_net)
+                model_actor.load_state_dict({**model_actor.state_dict(), **get_inner_model(nn_parms_worker.logits_net).state_dict()})
         
-            # Start training here
-            agent.start_training(tb_writer, run_id)
-            if tb_writer:
-                agent.log_performance(tb_writer)
-            
+                # Start training here
+                agent.start_training(tb_writer, run_id)
+                if tb_writer:
+                    agent.log_performance(tb_writer)
+    finally:
+        # stop the worker processes when training ends or fails
+        agent.close()
 
 
 if __name__ == "__main__":
@@ -5,7 +5,7 @@ from gym.spaces import Discrete
 from policy import MlpPolicy, DiagonalGaussianMlpPolicy
 from utils import get_inner_model, save_frames_as_gif
 from utils import env_wrapper
-import random
+from rollout import RolloutEngine
 
 class Worker:
 
@@ -53,8 +53,15 @@ class Worker:
         
         if self.id == 1:
             print(self.logits_net)
+        
+        # batch of envs for collecting training experience, the first one is self.env
+        self.rollout_engine = RolloutEngine(env_name, gamma, max_epi_len,
+                                            num_envs = getattr(opts, 'num_envs', 1), envs = [self.env])
 
     
+    def seed(self, seed):
+        self.rollout_engine.seed(seed)
+    
     def load_param_from_master(self, param):
         model_actor = get_inner_model(self.logits_net)
         model_actor.load_state_dict({**model_actor.state_dict(), **param})
@@ -86,102 +93,9 @@ class Worker:
         return np.sum(ep_rew), len(ep_rew), ep_rew
     
     def collect_experience_for_training(self, B, device, record = False, sample = True, attack_type = None):
-        # make some empty lists for logging.
-        batch_weights = []      # for R(tau) weighting in policy gradient
-        batch_rets = []         # for measuring episode returns
-        batch_lens = []         # for measuring episode lengths
-        batch_log_prob = []     # for gradient computing
-
-        # reset episode-specific variables
-        obs = self.env.reset()  # first obs comes from starting distribution
-        done = False            # signal from environment that episode is over
-        ep_rews = []            # list for rewards accrued throughout ep
-        
-        # make two lists for recording the trajectory
-        if record:
-            batch_states = []
-            batch_actions = []
-
-        t = 1
-        # collect experience by acting in the environment with current policy
-        while True:
-            # save trajectory
-            if record:
-                batch_states.append(obs)
-            # act in the environment  
-            obs = env_wrapper(self.env_name, obs)
-            
-            # simulate random-action attacker if needed
-            if self.is_Byzantine and attack_type is not None and self.attack_type == 'random-action':
-                act_rnd = self.env.action_space.sample()
-                if isinstance(act_rnd, int): # discrete action space
-                    act_rnd = 0
-                else: # continuous
-                    act_rnd = np.zeros(len(self.env.action_space.sample()), dtype=np.float32) 
-                act, log_prob = self.logits_net(torch.as_tensor(obs, dtype=torch.float32).to(device), sample = sample, fixed_action = act_rnd)
-            else:
-                act, log_prob = self.logits_net(torch.as_tensor(obs, dtype=torch.float32).to(device), sample = sample)
-           
-            obs, rew, done, info = self.env.step(act)
-            
-            # simulate reward-flipping attacker if needed
-            if self.is_Byzantine and attack_type is not None and self.attack_type == 'reward-flipping': 
-                rew = - rew
-                
-            # timestep
-            t = t + 1
-            
-            # save action_log_prob, reward
-            batch_log_prob.append(log_prob)
-            
-            ep_rews.append(rew)
-            
-            # save trajectory
-            if record:
-                batch_actions.append(act)
-
-            if done or len(ep_rews) >= self.max_epi_len:
-                
-                # if episode is over, record info about episode
-                ep_ret, ep_len = sum(ep_rews), len(ep_rews)
-                batch_rets.append(ep_ret)
-                batch_lens.append(ep_len)
-                
-                # the weight for each logprob(a_t|s_T) is sum_t^T (gamma^(t'-t) * r_t')
-                returns = []
-                R = 0
-                # simulate random-reware attacker if needed
-                if self.is_Byzantine and attack_type is not None and self.attack_type == 'random-reward': 
-                    random.shuffle(ep_rews)
-                    for r in ep_rews:
-                        R = r + self.gamma * R
-                        returns.insert(0, R)
-                else:
-                    for r in ep_rews[::-1]:
-                        R = r + self.gamma * R
-                        returns.insert(0, R)            
-                returns = torch.tensor(returns, dtype=torch.float32)
-                
-                # return whitening
-                advantage = (returns - returns.mean()) / (returns.std() + 1e-20)
-                batch_weights += advantage
-
-                # end experience loop if we have enough of it
-                if len(batch_lens) >= B:
-                    break
-                
-                # reset episode-specific variables
-                obs, done, ep_rews, t = self.env.reset(), False, [], 1
-
-
-        # make torch tensor and restrict to batch_size
-        weights = torch.as_tensor(batch_weights, dtype = torch.float32).to(device)
-        logp = torch.stack(batch_log_prob)
-
-        if record:
-            return weights, logp, batch_rets, batch_lens, batch_states, batch_actions
-        else:
-            return weights, logp, batch_rets, batch_lens
+        # step num_envs environments at once with one batched policy forward per step
+        attack_type = self.attack_type if self.is_Byzantine and attack_type is not None else None
+        return self.rollout_engine.collect(self.logits_net, B, device, record = record, sample = sample, attack_type = attack_type)
     
     
     def train_one_epoch(self, B, device, sample):
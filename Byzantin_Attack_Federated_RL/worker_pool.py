@@ -0,0 +1,127 @@
+import os
+import queue
+import traceback
+import torch
+import torch.multiprocessing as mp
+
+
+def worker_run(worker, param, opts, Batch_size, seed):
+
+    # distribute current parameters
+    worker.load_param_from_master(param)
+    worker.seed(seed)
+
+    # get returned gradients and info from all agents
+    out = worker.train_one_epoch(Batch_size, opts.device, opts.do_sample_for_training)
+
+    # store all values
+    return out
+
+
+def worker_process_loop(workers, ids, param_buf, grad_buf, layout, opts, cmd_queue, result_queue):
+    # the workers (and their envs) stay resident in this process for the whole run
+    torch.set_num_threads(1)
+
+    # views of the shared parameter buffer, refreshed in place by the master every epoch
+    param = {name: param_buf[start:end].view(shape) for name, start, end, shape in layout}
+
+    while True:
+        cmd = cmd_queue.get()
+        if cmd is None:
+            break
+        Batch_size, seeds = cmd
+        for worker, idx in zip(workers, ids):
+            try:
+                grad, loss, rets, lens = worker_run(worker, param, opts, Batch_size, seeds[idx])
+
+                # only the flattened gradient goes back, written into the shared gradient buffer
+                grad_buf[idx].copy_(torch.cat([g.reshape(-1) for g in grad]))
+                result_queue.put((idx, (loss, rets, lens), None))
+            except Exception:
+                result_queue.put((idx, None, traceback.format_exc()))
+
+
+class PersistentWorkerPool:
+
+    # seconds between two checks that the worker processes are still alive
+    LIVENESS_CHECK_INTERVAL = 10
+
+    def __init__(self, workers, master, opts, num_processes = None):
+
+        # layout of the flattened policy parameters
+        self.layout = []
+        start = 0
+        for name, tensor in master.logits_net.state_dict().items():
+            self.layout.append((name, start, start + tensor.numel(), tensor.shape))
+            start += tensor.numel()
+        self.param_shapes = [item.shape for item in master.parameters()]
+
+        # shared memory buffers: current policy parameters and one gradient vector per worker
+        self.param_buf = torch.zeros(start).share_memory_()
+        self.grad_buf = torch.zeros(len(workers), sum(s.numel() for s in self.param_shapes)).share_memory_()
+        self.num_worker = len(workers)
+
+        # assign workers to long-lived processes round-robin
+        num_processes = min(num_processes or self.num_worker, self.num_worker, os.cpu_count())
+        ctx = mp.get_context('fork')
+        self.result_queue = ctx.Queue()
+        self.cmd_queues = []
+        self.processes = []
+        for p in range(num_processes):
+            ids = list(range(p, self.num_worker, num_processes))
+            cmd_queue = ctx.Queue()
+            process = ctx.Process(target = worker_process_loop,
+                                  args = ([workers[i] for i in ids], ids, self.param_buf, self.grad_buf, self.layout,
+                                          opts, cmd_queue, self.result_queue),
+                                  daemon = True)
+            process.start()
+            self.cmd_queues.append(cmd_queue)
+            self.processes.append(process)
+
+    def run(self, param, Batch_size, seeds):
+        """
+        :param param: state_dict of the master policy
+        :return: list of (grad, loss, rets, lens) of each worker, in worker order
+        """
+
+        # publish current parameters
+        with torch.no_grad():
+            for name, start, end, shape in self.layout:
+                self.param_buf[start:end].copy_(param[name].reshape(-1))
+
+        for cmd_queue in self.cmd_queues:
+            cmd_queue.put((Batch_size, seeds))
+
+        # wait for every worker, even after a failure, so no result of this epoch is left queued for the next one
+        results = [None] * self.num_worker
+        errors = []
+        for _ in range(self.num_worker):
+            idx, out, error = self.get_result()
+            if error is not None:
+                errors.append((idx, error))
+                continue
+            loss, rets, lens = out
+            grad = list(torch.split(self.grad_buf[idx].clone(), [s.numel() for s in self.param_shapes]))
+            results[idx] = ([g.view(s) for g, s in zip(grad, self.param_shapes)], loss, rets, lens)
+        if errors:
+            raise RuntimeError('worker %d failed:\n%s' % errors[0])
+        return results
+
+    def get_result(self):
+        """
+        Wait for the next worker result, raising if a worker process died (e.g. killed for lack of memory
+        or crashed inside the environment).
+        """
+        while True:
+            try:
+                return self.result_queue.get(timeout = self.LIVENESS_CHECK_INTERVAL)
+            except queue.Empty:
+                for p, process in enumerate(self.processes):
+                    if not process.is_alive():
+                        raise RuntimeError('worker process %d died with exit code %s' % (p, process.exitcode))
+
+    def close(self):
+        for cmd_queue in self.cmd_queues:
+            cmd_queue.put(None)
+        for process in self.processes:
+            process.join()
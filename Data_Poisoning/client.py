@@ -5,11 +5,47 @@ from sklearn.metrics import classification_report
 from federated_learning.schedulers import MinCapableStepLR
 import os
 import numpy
-import copy
+
+def load_default_model(args):
+    """
+    Load a model from default model file.
+
+    This is used to ensure consistent default model behavior.
+
+    :param args: experiment arguments
+    :type args: Arguments
+    """
+    model_class = args.get_net()
+    default_model_path = os.path.join(args.get_default_model_folder_path(), model_class.__name__ + ".model")
+
+    return load_model_from_file(args, default_model_path)
+
+def load_model_from_file(args, model_file_path):
+    """
+    Load a model from a file.
+
+    :param args: experiment arguments
+    :type args: Arguments
+    :param model_file_path: string
+    """
+    model_class = args.get_net()
+    model = model_class()
+
+    if os.path.exists(model_file_path):
+        try:
+            model.load_state_dict(torch.load(model_file_path))
+        except:
+            args.get_logger().warning("Couldn't load model. Attempting to map CUDA tensors to CPU to solve error.")
+
+            model.load_state_dict(torch.load(model_file_path, map_location=torch.device('cpu')))
+    else:
+        args.get_logger().warning("Could not find model: {}".format(model_file_path))
+
+    return model
 
 class Client:
 
-    def __init__(self, args, client_idx, train_data_loader, test_data_loader):
+    def __init__(self, args, client_idx, train_data_loader, test_data_loader, parameter_store=None):
         """
         :param args: experiment arguments
         :type args: Arguments
@@ -19,22 +55,30 @@ class Client:
         :type train_data_loader: torch.utils.data.DataLoader
         :param test_data_loader: Test data loader
         :type test_data_loader: torch.utils.data.DataLoader
+        :param parameter_store: global parameters pulled when the client is trained or tested.
+            Without a store the client loads the default model right away and keeps it.
+        :type parameter_store: GlobalParameterStore
         """
         self.args = args
         self.client_idx = client_idx
 
         self.device = self.initialize_device()
-        self.set_net(self.load_default_model())
-
         self.loss_function = self.args.get_loss_function()()
-        self.optimizer = optim.SGD(self.net.parameters(),
-            lr=self.args.get_learning_rate(),
-            momentum=self.args.get_momentum())
+
+        self.parameter_store = parameter_store
+        self.parameters_version = None
+        # SGD state (momentum buffers and learning rate) kept while the client holds no model
+        self.optimizer_state = None
+        self.net = None
+        self.optimizer = None
         self.scheduler = MinCapableStepLR(self.args.get_logger(), self.optimizer,
             self.args.get_scheduler_step_size(),
             self.args.get_scheduler_gamma(),
             self.args.get_min_lr())
 
+        if self.parameter_store is None:
+            self.set_net(self.load_default_model())
+
         self.train_data_loader = train_data_loader
         self.test_data_loader = test_data_loader
 
@@ -49,23 +93,57 @@ class Client:
 
     def set_net(self, net):
         """
-        Set the client's NN.
+        Set the client's NN and the SGD optimizer on its parameters.
 
         :param net: torch.nn
         """
         self.net = net
         self.net.to(self.device)
 
+        self.optimizer = optim.SGD(self.net.parameters(),
+            lr=self.args.get_learning_rate(),
+            momentum=self.args.get_momentum())
+        if self.optimizer_state is not None:
+            self.optimizer.load_state_dict(self.optimizer_state)
+        self.scheduler.optimizer = self.optimizer
+
+    def pull_nn_parameters(self):
+        """
+        Bring the client's NN to the latest version of the global parameters, building it if the client holds none.
+        """
+        if self.parameter_store is None:
+            return
+
+        if self.net is None:
+            # building the NN must not move the RNG used to shuffle the training data
+            with torch.random.fork_rng(devices=[]):
+                self.set_net(self.args.get_net()())
+
+        version = self.parameter_store.get_version()
+        if self.parameters_version != version:
+            self.net.load_state_dict(self.parameter_store.get_nn_parameters(), strict=True)
+            self.parameters_version = version
+
+    def release_nn(self):
+        """
+        Drop the client's NN once its update has been aggregated. Only the optimizer state is kept.
+        """
+        if self.parameter_store is None or self.net is None:
+            return
+
+        self.optimizer_state = self.optimizer.state_dict()
+        self.net = None
+        self.optimizer = None
+        self.scheduler.optimizer = None
+        self.parameters_version = None
+
     def load_default_model(self):
         """
         Load a model from default model file.
 
         This is used to ensure consistent default model behavior.
         """
-        model_class = self.args.get_net()
-        default_model_path = os.path.join(self.args.get_default_model_folder_path(), model_class.__name__ + ".model")
-
-        return self.load_model_from_file(default_model_path)
+        return load_default_model(self.args)
 
     def load_model_from_file(self, model_file_path):
         """
@@ -73,20 +151,7 @@ class Client:
 
         :param model_file_path: string
         """
-        model_class = self.args.get_net()
-        model = model_class()
-
-        if os.path.exists(model_file_path):
-            try:
-                model.load_state_dict(torch.load(model_file_path))
-            except:
-                self.args.get_logger().warning("Couldn't load model. Attempting to map CUDA tensors to CPU to solve error.")
-
-                model.load_state_dict(torch.load(model_file_path, map_location=torch.device('cpu')))
-        else:
-            self.args.get_logger().warning("Could not find model: {}".format(model_file_path))
-
-        return model
+        return load_model_from_file(self.args, model_file_path)
 
     def get_client_index(self):
         """
@@ -98,22 +163,16 @@ class Client:
         """
         Return the NN's parameters.
         """
-        return self.net.state_dict()
+        self.pull_nn_parameters()
 
-    def update_nn_parameters(self, new_params):
-        """
-        Update the NN's parameters.
-
-        :param new_params: New weights for the neural network
-        :type new_params: dict
-        """
-        self.net.load_state_dict(copy.deepcopy(new_params), strict=True)
+        return self.net.state_dict()
 
     def train(self, epoch):
         """
         :param epoch: Current epoch #
         :type epoch: int
         """
+        self.pull_nn_parameters()
         self.net.train()
 
         # save model
@@ -173,6 +232,7 @@ class Client:
         return numpy.diagonal(confusion_mat) / numpy.sum(confusion_mat, axis=1)
 
     def test(self):
+        self.pull_nn_parameters()
         self.net.eval()
 
         correct = 0
@@ -42,6 +42,9 @@ class Arguments:
         self.num_workers = 50
         self.num_poisoned_workers = 0
 
+        # Number of processes the selected clients of a round are trained in, 1 trains them in the server process
+        self.num_training_processes = 1
+
         #self.net = Cifar10CNN
         self.net = FashionMNISTCNN
 
@@ -129,6 +132,12 @@ class Arguments:
     def get_num_poisoned_workers(self):
         return self.num_poisoned_workers
 
+    def set_num_training_processes(self, num_training_processes):
+        self.num_training_processes = num_training_processes
+
+    def get_num_training_processes(self):
+        return self.num_training_processes
+
     def get_learning_rate(self):
         return self.lr
 
@@ -202,6 +211,7 @@ class Arguments:
                "Epoch Save End Suffix: {}\n".format(self.epoch_save_end_suffix) + \
                "Number of Clients: {}\n".format(self.num_workers) + \
                "Number of Poisoned Clients: {}\n".format(self.num_poisoned_workers) + \
+               "Number of Training Processes: {}\n".format(self.num_training_processes) + \
                "NN: {}\n".format(self.net) + \
                "Train Data Loader Path: {}\n".format(self.train_data_loader_pickle_path) + \
                "Test Data Loader Path: {}\n".format(self.test_data_loader_pickle_path) + \
@@ -1,3 +1,4 @@
 from .dataset import Dataset
 from .cifar10 import CIFAR10Dataset
 from .fashion_mnist import FashionMNISTDataset
+from .partitioned_dataset import PartitionedDataset
@@ -1,7 +1,6 @@
 from .dataset import Dataset
 from torchvision import datasets
 from torchvision import transforms
-from torch.utils.data import DataLoader
 
 class CIFAR10Dataset(Dataset):
 
@@ -18,10 +17,7 @@ class CIFAR10Dataset(Dataset):
             transforms.ToTensor(),
             normalize
         ])
-        train_dataset = datasets.CIFAR10(root=self.get_args().get_data_path(), train=True, download=True, transform=transform)
-        train_loader = DataLoader(train_dataset, batch_size=len(train_dataset))
-
-        train_data = self.get_tuple_from_data_loader(train_loader)
+        train_data = self.load_cached_dataset("cifar10_train", lambda: datasets.CIFAR10(root=self.get_args().get_data_path(), train=True, download=True, transform=transform), transform)
 
         self.get_args().get_logger().debug("Finished loading CIFAR10 train data")
 
@@ -35,10 +31,7 @@ class CIFAR10Dataset(Dataset):
             transforms.ToTensor(),
             normalize
         ])
-        test_dataset = datasets.CIFAR10(root=self.get_args().get_data_path(), train=False, download=True, transform=transform)
-        test_loader = DataLoader(test_dataset, batch_size=len(test_dataset))
-
-        test_data = self.get_tuple_from_data_loader(test_loader)
+        test_data = self.load_cached_dataset("cifar10_test", lambda: datasets.CIFAR10(root=self.get_args().get_data_path(), train=False, download=True, transform=transform), transform)
 
         self.get_args().get_logger().debug("Finished loading CIFAR10 test data")
 
@@ -3,6 +3,8 @@ from torch.utils.data import DataLoader
 from torch.utils.data import TensorDataset
 import torch
 import numpy
+import os
+import hashlib
 
 class Dataset:
 
@@ -108,4 +110,54 @@ class Dataset:
 		:type data_loader: torch.utils.data.DataLoader
 		:return: tuple
 		"""
-		return (next(iter(data_loader))[0].numpy(), next(iter(data_loader))[1].numpy())
+		data, target = next(iter(data_loader))
+
+		return (data.numpy(), target.numpy())
+
+	def load_cached_dataset(self, cache_name, load_dataset, transform, batch_size=1000):
+		"""
+		Get a tuple representation of a dataset, decoded and transformed only once.
+
+		The first call writes the features and labels to <data_path>/tensor_cache/<cache_name>_<hash>_{X,Y}.npy
+		batch by batch, later calls memory-map these files without building the dataset.
+		The hash is taken from repr(transform), so changing the transforms writes a new cache.
+
+		:param cache_name: name of the cached files
+		:type cache_name: str
+		:param load_dataset: function returning the torch dataset
+		:type load_dataset: function
+		:param transform: transform applied by the dataset
+		:type transform: torchvision.transforms.Compose
+		:param batch_size: number of samples transformed at once when the cache is written
+		:type batch_size: int
+		:return: tuple
+		"""
+		cache_folder = os.path.join(self.args.get_data_path(), "tensor_cache")
+		cache_name = cache_name + "_" + hashlib.md5(repr(transform).encode()).hexdigest()[:8]
+		X_path = os.path.join(cache_folder, cache_name + "_X.npy")
+		Y_path = os.path.join(cache_folder, cache_name + "_Y.npy")
+
+		if not (os.path.exists(X_path) and os.path.exists(Y_path)):
+			self.args.get_logger().debug("Writing tensor cache: {}".format(cache_name))
+			os.makedirs(cache_folder, exist_ok=True)
+
+			dataset = load_dataset()
+			X = Y = None
+			start = 0
+			for data, target in DataLoader(dataset, batch_size=batch_size):
+				if X is None:
+					X = numpy.lib.format.open_memmap(X_path + ".tmp", mode="w+", dtype=data.numpy().dtype, shape=(len(dataset),) + tuple(data.shape[1:]))
+					Y = numpy.lib.format.open_memmap(Y_path + ".tmp", mode="w+", dtype=target.numpy().dtype, shape=(len(dataset),) + tuple(target.shape[1:]))
+				X[start:start + len(data)] = data.numpy()
+				Y[start:start + len(target)] = target.numpy()
+				start += len(data)
+			X.flush()
+			Y.flush()
+			del X, Y
+
+			# renamed once complete, an interrupted run never leaves a partial cache behind
+			os.replace(X_path + ".tmp", X_path)
+			os.replace(Y_path + ".tmp", Y_path)
+
+		# copy-on-write mapping, the files are never modified
+		return (numpy.load(X_path, mmap_mode="c"), numpy.load(Y_path, mmap_mode="c"))
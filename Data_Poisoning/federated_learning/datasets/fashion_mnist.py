@@ -1,7 +1,6 @@
 from .dataset import Dataset
 from torchvision import datasets
 from torchvision import transforms
-from torch.utils.data import DataLoader
 
 class FashionMNISTDataset(Dataset):
 
@@ -11,10 +10,8 @@ class FashionMNISTDataset(Dataset):
     def load_train_dataset(self):
         self.get_args().get_logger().debug("Loading Fashion MNIST train data")
 
-        train_dataset = datasets.FashionMNIST(self.get_args().get_data_path(), train=True, download=True, transform=transforms.Compose([transforms.ToTensor()]))
-        train_loader = DataLoader(train_dataset, batch_size=len(train_dataset))
-
-        train_data = self.get_tuple_from_data_loader(train_loader)
+        transform = transforms.Compose([transforms.ToTensor()])
+        train_data = self.load_cached_dataset("fashion_mnist_train", lambda: datasets.FashionMNIST(self.get_args().get_data_path(), train=True, download=True, transform=transform), transform)
 
         self.get_args().get_logger().debug("Finished loading Fashion MNIST train data")
 
@@ -23,10 +20,8 @@ class FashionMNISTDataset(Dataset):
     def load_test_dataset(self):
         self.get_args().get_logger().debug("Loading Fashion MNIST test data")
 
-        test_dataset = datasets.FashionMNIST(self.get_args().get_data_path(), train=False, download=True, transform=transforms.Compose([transforms.ToTensor()]))
-        test_loader = DataLoader(test_dataset, batch_size=len(test_dataset))
-
-        test_data = self.get_tuple_from_data_loader(test_loader)
+        transform = transforms.Compose([transforms.ToTensor()])
+        test_data = self.load_cached_dataset("fashion_mnist_test", lambda: datasets.FashionMNIST(self.get_args().get_data_path(), train=False, download=True, transform=transform), transform)
 
         self.get_args().get_logger().debug("Finished loading Fashion MNIST test data")
 
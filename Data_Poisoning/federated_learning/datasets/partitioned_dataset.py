@@ -0,0 +1,80 @@
+import numpy
+import torch
+from torch.utils.data import SequentialSampler
+from torch.utils.data import TensorDataset
+
+class PartitionedDataset:
+    """
+    Training data of all workers in one contiguous features array and one contiguous labels array,
+    ordered so that every worker's samples form one index range.
+
+    The workers' data are views of these arrays, and the data loaders built from them
+    (Dataset.get_data_loader_from_data) share their memory, so the data is held once.
+    """
+
+    def __init__(self, X, Y, worker_ranges):
+        """
+        :param X: data features of all workers
+        :type X: numpy.Array()
+        :param Y: data labels of all workers
+        :type Y: numpy.Array()
+        :param worker_ranges: (start, end) of every worker in X and Y
+        :type worker_ranges: list(tuple)
+        """
+        self.X = X
+        self.Y = Y
+        self.worker_ranges = worker_ranges
+
+    @classmethod
+    def from_data_loader(cls, data_loader, num_workers):
+        """
+        Gives each worker the same number of batches of training data, batch i going to worker i % num_workers,
+        as distribute_batches_equally followed by convert_distributed_data_into_numpy.
+
+        :param data_loader: Training data loader
+        :type data_loader: torch.utils.data.DataLoader
+        :param num_workers: number of workers
+        :type num_workers: int
+        """
+        dataset = data_loader.dataset
+        if isinstance(dataset, TensorDataset) and isinstance(data_loader.sampler, SequentialSampler) \
+                and data_loader.batch_size is not None:
+            # the batches are consecutive slices of the dataset tensors, no need to iterate over the loader
+            X, Y = dataset.tensors
+            num_batches = len(data_loader)
+            batch_lengths = numpy.full(num_batches, data_loader.batch_size)
+            batch_lengths[-1] = min(data_loader.batch_size, len(dataset) - (num_batches - 1) * data_loader.batch_size)
+            X = X[:batch_lengths.sum()]
+            Y = Y[:batch_lengths.sum()]
+        else:
+            batches = list(data_loader)
+            X = torch.cat([data for data, _ in batches])
+            Y = torch.cat([target for _, target in batches])
+            batch_lengths = numpy.array([len(target) for _, target in batches])
+
+        # stable sort by worker keeps every worker's batches in loader order
+        sample_workers = numpy.repeat(numpy.arange(len(batch_lengths)) % num_workers, batch_lengths)
+        order = torch.from_numpy(numpy.argsort(sample_workers, kind="stable"))
+        ends = numpy.cumsum(numpy.bincount(sample_workers, minlength=num_workers)).tolist()
+        worker_ranges = list(zip([0] + ends[:-1], ends))
+
+        return cls(X.index_select(0, order).numpy(), Y.index_select(0, order).numpy(), worker_ranges)
+
+    def get_num_workers(self):
+        return len(self.worker_ranges)
+
+    def get_worker_data(self, worker_idx):
+        """
+        :return: (features, labels) of the worker, views of the contiguous arrays
+        :rtype: tuple
+        """
+        start, end = self.worker_ranges[worker_idx]
+
+        return (self.X[start:end], self.Y[start:end])
+
+    def get_distributed_dataset(self):
+        """
+        :return: the workers' data in the format of convert_distributed_data_into_numpy, as views
+        :rtype: list(tuple)
+        """
+        return [self.get_worker_data(worker_idx) for worker_idx in range(self.get_num_workers())]
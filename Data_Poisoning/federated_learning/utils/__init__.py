@@ -1,4 +1,5 @@
 from .class_flipping_methods import *
+from .label_flipping import LabelFlip
 from .label_replacement import apply_class_label_replacement
 from .tensor_converter import convert_distributed_data_into_numpy
 from .identify_random_elements import identify_random_elements
@@ -16,6 +17,8 @@ from .data_loader_utils import load_data_loader_from_file
 from .data_loader_utils import generate_test_loader
 from .data_loader_utils import save_data_loader_to_file
 from .fed_avg import average_nn_parameters
+from .client_executor import create_client_executor
+from .parameter_store import GlobalParameterStore
 from .client_utils import log_client_data_statistics
 from .poison_data import poison_data
 from .model_list_parser import *
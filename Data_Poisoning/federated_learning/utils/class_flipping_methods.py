@@ -1,424 +1,34 @@
-def default_no_change(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    return targets
-
-def replace_0_with_9(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 0:
-            targets[idx] = 9
-
-    return targets
-
-def replace_0_with_6(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 0:
-            targets[idx] = 6
-
-    return targets
-
-def replace_4_with_6(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 4:
-            targets[idx] = 6
-
-    return targets
-
-def replace_1_with_3(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 1:
-            targets[idx] = 3
-
-    return targets
-
-def replace_1_with_0(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 1:
-            targets[idx] = 0
-
-    return targets
-
-def replace_2_with_3(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 2:
-            targets[idx] = 3
-
-    return targets
-
-def replace_2_with_7(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 2:
-            targets[idx] = 7
-
-    return targets
-
-def replace_3_with_9(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 3:
-            targets[idx] = 9
-
-    return targets
-
-def replace_3_with_7(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 3:
-            targets[idx] = 7
-
-    return targets
-
-def replace_4_with_9(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 4:
-            targets[idx] = 9
-
-    return targets
-
-def replace_4_with_1(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 4:
-            targets[idx] = 1
-
-    return targets
-
-def replace_5_with_3(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 5:
-            targets[idx] = 3
-
-    return targets
-
-def replace_1_with_9(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 1:
-            targets[idx] = 9
-
-    return targets
-
-def replace_0_with_2(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 0:
-            targets[idx] = 2
-
-    return targets
-
-def replace_5_with_9(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 5:
-            targets[idx] = 9
-
-    return targets
-
-def replace_5_with_7(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 5:
-            targets[idx] = 7
-
-    return targets
-
-def replace_6_with_3(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 6:
-            targets[idx] = 3
-
-    return targets
-
-def replace_6_with_0(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 6:
-            targets[idx] = 0
-
-    return targets
-
-def replace_6_with_7(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 6:
-            targets[idx] = 7
-
-    return targets
-
-def replace_7_with_9(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 7:
-            targets[idx] = 9
-
-    return targets
-
-def replace_7_with_1(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 7:
-            targets[idx] = 1
-
-    return targets
-
-def replace_8_with_9(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 8:
-            targets[idx] = 9
-
-    return targets
-
-def replace_8_with_6(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 8:
-            targets[idx] = 6
-
-    return targets
-
-def replace_9_with_3(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 9:
-            targets[idx] = 3
-
-    return targets
-
-def replace_9_with_7(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 9:
-            targets[idx] = 7
-
-    return targets
-
-def replace_0_with_9_1_with_3(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 0:
-            targets[idx] = 9
-        elif targets[idx] == 1:
-            targets[idx] = 3
-
-    return targets
-
-def replace_0_with_6_1_with_0(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 0:
-            targets[idx] = 6
-        elif targets[idx] == 1:
-            targets[idx] = 0
-
-    return targets
-
-
-def replace_2_with_3_3_with_9(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 2:
-            targets[idx] = 3
-        elif targets[idx] == 3:
-            targets[idx] = 9
-
-    return targets
-
-def replace_2_with_7_3_with_7(targets, target_set):
-    """
-    :param targets: Target class IDs
-    :type targets: list
-    :param target_set: Set of class IDs possible
-    :type target_set: list
-    :return: new class IDs
-    """
-    for idx in range(len(targets)):
-        if targets[idx] == 2:
-            targets[idx] = 7
-        elif targets[idx] == 3:
-            targets[idx] = 7
-
-    return targets
+from .label_flipping import LabelFlip
+
+# Each attack is a class mapping table applied in one gather, see LabelFlip. It is logged as replace_<src>_with_<dst>_...
+
+default_no_change = LabelFlip({}, "default_no_change")
+replace_0_with_9 = LabelFlip({0: 9})
+replace_0_with_6 = LabelFlip({0: 6})
+replace_4_with_6 = LabelFlip({4: 6})
+replace_1_with_3 = LabelFlip({1: 3})
+replace_1_with_0 = LabelFlip({1: 0})
+replace_2_with_3 = LabelFlip({2: 3})
+replace_2_with_7 = LabelFlip({2: 7})
+replace_3_with_9 = LabelFlip({3: 9})
+replace_3_with_7 = LabelFlip({3: 7})
+replace_4_with_9 = LabelFlip({4: 9})
+replace_4_with_1 = LabelFlip({4: 1})
+replace_5_with_3 = LabelFlip({5: 3})
+replace_1_with_9 = LabelFlip({1: 9})
+replace_0_with_2 = LabelFlip({0: 2})
+replace_5_with_9 = LabelFlip({5: 9})
+replace_5_with_7 = LabelFlip({5: 7})
+replace_6_with_3 = LabelFlip({6: 3})
+replace_6_with_0 = LabelFlip({6: 0})
+replace_6_with_7 = LabelFlip({6: 7})
+replace_7_with_9 = LabelFlip({7: 9})
+replace_7_with_1 = LabelFlip({7: 1})
+replace_8_with_9 = LabelFlip({8: 9})
+replace_8_with_6 = LabelFlip({8: 6})
+replace_9_with_3 = LabelFlip({9: 3})
+replace_9_with_7 = LabelFlip({9: 7})
+replace_0_with_9_1_with_3 = LabelFlip({0: 9, 1: 3})
+replace_0_with_6_1_with_0 = LabelFlip({0: 6, 1: 0})
+replace_2_with_3_3_with_9 = LabelFlip({2: 3, 3: 9})
+replace_2_with_7_3_with_7 = LabelFlip({2: 7, 3: 7})
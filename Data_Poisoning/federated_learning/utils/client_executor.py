@@ -0,0 +1,187 @@
+import os
+import queue
+import traceback
+import torch
+import torch.multiprocessing as mp
+
+
+class SerialClientExecutor:
+    """
+    Trains the selected clients one after the other in the server process.
+    """
+
+    def __init__(self, args, clients):
+        """
+        :param args: experiment arguments
+        :type args: Arguments
+        :param clients: clients
+        :type clients: list(Client)
+        """
+        self.args = args
+        self.clients = clients
+
+    def train_clients(self, epoch, client_idxs):
+        """
+        Train the given clients for one epoch.
+
+        :param epoch: epoch
+        :type epoch: int
+        :param client_idxs: indices of the clients to train
+        :type client_idxs: list(int)
+        :return: list of the trained clients' parameters, in the order of client_idxs
+        """
+        for client_idx in client_idxs:
+            self.args.get_logger().info("Training epoch #{} on client #{}", str(epoch), str(self.clients[client_idx].get_client_index()))
+            self.clients[client_idx].train(epoch)
+
+        return [self.clients[client_idx].get_nn_parameters() for client_idx in client_idxs]
+
+    def close(self):
+        pass
+
+
+def _store_flat_parameters(net, flat, layout):
+    with torch.no_grad():
+        state = net.state_dict()
+        for name, start, end, shape in layout:
+            flat[start:end].copy_(state[name].reshape(-1))
+
+
+def _client_process_loop(clients, layout, num_threads, cmd_queue, result_queue):
+    # the clients stay in this process for the whole experiment, so their SGD momentum buffers
+    # and MinCapableStepLR epoch counters carry over from one round to the next
+    torch.set_num_threads(num_threads)
+
+    while True:
+        cmd = cmd_queue.get()
+        if cmd is None:
+            break
+        epoch, client_slots, result_buf = cmd
+        for client_idx, slot in client_slots:
+            try:
+                client = clients[client_idx]
+                client.args.get_logger().info("Training epoch #{} on client #{}", str(epoch), str(client.get_client_index()))
+
+                # the client pulls the averaged parameters from the shared GlobalParameterStore
+                client.train(epoch)
+                _store_flat_parameters(client.net, result_buf[slot], layout)
+                client.release_nn()
+                result_queue.put((client_idx, None))
+            except Exception:
+                result_queue.put((client_idx, traceback.format_exc()))
+
+
+class ProcessClientExecutor:
+    """
+    Trains the selected clients concurrently in long-lived forked processes.
+
+    Client i always lives in process i % num_processes. The clients pull the averaged parameters
+    from their shared GlobalParameterStore, and the k-th selected client of a round writes its trained
+    parameters into row k of a shared [num_selected, num_params] buffer, which average_nn_parameters
+    reads without copies.
+    """
+
+    # seconds between two checks that the training processes are still alive
+    LIVENESS_CHECK_INTERVAL = 10
+
+    def __init__(self, args, clients):
+        """
+        :param args: experiment arguments
+        :type args: Arguments
+        :param clients: clients
+        :type clients: list(Client)
+        """
+        self.args = args
+        self.clients = clients
+
+        # same layout as the store, one row per client selected in the round, grown when a round selects more
+        self.layout = clients[0].parameter_store.layout
+        self.result_buf = torch.zeros(0, clients[0].parameter_store.flat.numel()).share_memory_()
+
+        num_processes = min(args.get_num_training_processes(), len(clients))
+        num_threads = max(1, os.cpu_count() // num_processes)
+        ctx = mp.get_context("fork")
+        self.result_queue = ctx.Queue()
+        self.cmd_queues = []
+        self.processes = []
+        for p in range(num_processes):
+            cmd_queue = ctx.Queue()
+            process = ctx.Process(target=_client_process_loop,
+                                  args=(clients, self.layout, num_threads,
+                                        cmd_queue, self.result_queue),
+                                  daemon=True)
+            process.start()
+            self.cmd_queues.append(cmd_queue)
+            self.processes.append(process)
+
+    def get_nn_parameters(self, slot):
+        """
+        Return the parameters of the slot-th client trained in this round, as views of the shared result buffer.
+        """
+        row = self.result_buf[slot]
+
+        return {name: row[start:end].view(shape) for name, start, end, shape in self.layout}
+
+    def train_clients(self, epoch, client_idxs):
+        """
+        Train the given clients for one epoch.
+
+        :param epoch: epoch
+        :type epoch: int
+        :param client_idxs: indices of the clients to train
+        :type client_idxs: list(int)
+        :return: list of the trained clients' parameters, in the order of client_idxs
+        """
+        if len(client_idxs) > self.result_buf.shape[0]:
+            self.result_buf = torch.zeros(len(client_idxs), self.result_buf.shape[1]).share_memory_()
+
+        num_processes = len(self.cmd_queues)
+        for p, cmd_queue in enumerate(self.cmd_queues):
+            client_slots = [(client_idx, slot) for slot, client_idx in enumerate(client_idxs) if client_idx % num_processes == p]
+            cmd_queue.put((epoch, client_slots, self.result_buf))
+
+        for _ in client_idxs:
+            client_idx, error = self.get_result()
+            if error is not None:
+                raise RuntimeError("Training client #{} failed:\n{}".format(client_idx, error))
+
+        return [self.get_nn_parameters(slot) for slot in range(len(client_idxs))]
+
+    def get_result(self):
+        """
+        Wait for the next trained client, raising if a training process died (e.g. killed for lack of memory).
+        """
+        while True:
+            try:
+                return self.result_queue.get(timeout=self.LIVENESS_CHECK_INTERVAL)
+            except queue.Empty:
+                for p, process in enumerate(self.processes):
+                    if not process.is_alive():
+                        raise RuntimeError("Training process #{} died with exit code {}".format(p, process.exitcode))
+
+    def close(self):
+        for cmd_queue in self.cmd_queues:
+            cmd_queue.put(None)
+        for process in self.processes:
+            process.join()
+
+
+def create_client_executor(args, clients):
+    """
+    Serial executor for a single training process or when the clients train on CUDA,
+    which can not be used from forked processes. Process executor otherwise.
+
+    :param args: experiment arguments
+    :type args: Arguments
+    :param clients: clients
+    :type clients: list(Client)
+    """
+    if args.get_num_training_processes() <= 1:
+        return SerialClientExecutor(args, clients)
+
+    if clients[0].device.type == "cuda":
+        args.get_logger().warning("Clients train on CUDA, training them sequentially in the server process.")
+
+        return SerialClientExecutor(args, clients)
+
+    return ProcessClientExecutor(args, clients)
@@ -1,3 +1,5 @@
+import numpy
+
 def log_client_data_statistics(logger, label_class_set, distributed_dataset):
     """
     Logs all client data statistics.
@@ -9,9 +11,9 @@ def log_client_data_statistics(logger, label_class_set, distributed_dataset):
     :param distributed_dataset: distributed dataset
     :type distributed_dataset: list(tuple)
     """
+    label_class_set = numpy.asarray(label_class_set, dtype=numpy.int64)
     for client_idx in range(len(distributed_dataset)):
-        client_class_nums = {class_val : 0 for class_val in label_class_set}
-        for target in distributed_dataset[client_idx][1]:
-            client_class_nums[target] += 1
+        counts = numpy.bincount(numpy.asarray(distributed_dataset[client_idx][1], dtype=numpy.int64), minlength=label_class_set.max() + 1)
+        client_class_nums = counts[label_class_set]
 
-        logger.info("Client #{} has data distribution: {}".format(client_idx, str(list(client_class_nums.values()))))
+        logger.info("Client #{} has data distribution: {}".format(client_idx, str(client_class_nums.tolist())))
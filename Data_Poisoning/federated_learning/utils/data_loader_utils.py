@@ -1,4 +1,5 @@
 import numpy
+import torch
 from .label_replacement import apply_class_label_replacement
 import os
 import pickle
@@ -15,8 +16,11 @@ def generate_data_loaders_from_distributed_dataset(distributed_dataset, batch_si
     :type batch_size: int
     """
     data_loaders = []
-    for worker_training_data in distributed_dataset:
-        data_loaders.append(Dataset.get_data_loader_from_data(batch_size, worker_training_data[0], worker_training_data[1], shuffle=True))
+    for worker_idx, worker_training_data in enumerate(distributed_dataset):
+        # every worker shuffles with its own generator, so the order of its batches does not depend on
+        # which other workers trained before it or in which training process it runs
+        generator = torch.Generator().manual_seed(torch.initial_seed() + worker_idx)
+        data_loaders.append(Dataset.get_data_loader_from_data(batch_size, worker_training_data[0], worker_training_data[1], shuffle=True, generator=generator))
 
     return data_loaders
 
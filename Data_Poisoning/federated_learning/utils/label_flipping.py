@@ -0,0 +1,70 @@
+import numpy
+import torch
+
+
+class LabelFlip:
+    """
+    Label flipping attack described by a class mapping table.
+
+    Every source class is replaced by its target class in a single gather over the whole label
+    array, so all replacements happen at once: {2: 3, 3: 9} sends 2 to 3 and 3 to 9, it does not
+    chain 2 to 9. Classes missing from the mapping keep their label. Many-to-one mappings
+    ({2: 7, 3: 7}) and permutations ({0: 1, 1: 2, 2: 0}) are both valid.
+    """
+
+    def __init__(self, mapping, name=None):
+        """
+        :param mapping: source class ID -> target class ID
+        :type mapping: dict
+        :param name: name used when the attack is logged
+        :type name: str
+        """
+        self.mapping = {int(src): int(dst) for src, dst in mapping.items()}
+        self.name = name or "replace_" + "_".join("{}_with_{}".format(src, dst) for src, dst in self.mapping.items())
+        self.num_classes = max(list(self.mapping.keys()) + list(self.mapping.values()), default=-1) + 1
+
+    @classmethod
+    def permutation(cls, permutation, name=None):
+        """
+        :param permutation: permutation[i] is the new class ID of class i
+        :type permutation: list
+        """
+        return cls({src: dst for src, dst in enumerate(permutation) if src != dst}, name)
+
+    def get_table(self, num_classes):
+        """
+        :param num_classes: number of entries of the table, at least self.num_classes
+        :return: numpy array mapping every class ID to its new class ID
+        """
+        table = numpy.arange(max(num_classes, self.num_classes))
+        for src, dst in self.mapping.items():
+            table[src] = dst
+
+        return table
+
+    def __call__(self, targets, target_set=None):
+        """
+        Flip the labels in place.
+
+        :param targets: Target class IDs
+        :type targets: numpy.Array() or torch.Tensor or list
+        :param target_set: Set of class IDs possible, unused
+        :type target_set: set
+        :return: new class IDs
+        """
+        if len(targets) == 0:
+            return targets
+
+        if isinstance(targets, torch.Tensor):
+            table = torch.from_numpy(self.get_table(int(targets.max()) + 1)).to(targets.device, targets.dtype)
+            targets.copy_(table[targets.long()])
+        elif isinstance(targets, numpy.ndarray):
+            targets[...] = self.get_table(int(targets.max()) + 1)[targets.astype(numpy.int64, copy=False)]
+        else:
+            flipped = self.get_table(max(targets) + 1)[numpy.asarray(targets)]
+            targets[:] = flipped.tolist()
+
+        return targets
+
+    def __repr__(self):
+        return self.name
@@ -1,3 +1,5 @@
+import numpy
+
 def apply_class_label_replacement(X, Y, replacement_method):
     """
     Replace class labels using the replacement method
@@ -9,4 +11,4 @@ def apply_class_label_replacement(X, Y, replacement_method):
     :param replacement_method: Method to update targets
     :type replacement_method: method
     """
-    return (X, replacement_method(Y, set(Y)))
+    return (X, replacement_method(Y, set(numpy.unique(Y).tolist())))
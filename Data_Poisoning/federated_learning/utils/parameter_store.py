@@ -0,0 +1,51 @@
+import torch
+
+
+class GlobalParameterStore:
+    """
+    The single copy of the global model's parameters, with a version number bumped on every publish.
+
+    Clients pull the parameters when they are selected or tested and compare versions to skip
+    reloading what they already hold. The parameters and the version live in shared memory,
+    so clients forked into training processes see every publish of the server.
+    """
+
+    def __init__(self, initial_params):
+        """
+        :param initial_params: state_dict the clients start from
+        :type initial_params: dict
+        """
+        # the state_dict laid out in one float tensor (num_batches_tracked is stored as a float)
+        self.layout = []
+        start = 0
+        for name, tensor in initial_params.items():
+            self.layout.append((name, start, start + tensor.numel(), tensor.shape))
+            start += tensor.numel()
+
+        self.flat = torch.zeros(start).share_memory_()
+        self.version = torch.zeros(1, dtype=torch.long).share_memory_()
+        self.write(initial_params)
+
+    def write(self, params):
+        with torch.no_grad():
+            for name, start, end, shape in self.layout:
+                self.flat[start:end].copy_(params[name].reshape(-1))
+
+    def publish(self, new_params):
+        """
+        Replace the global parameters and bump the version.
+
+        :param new_params: New weights for the neural network
+        :type new_params: dict
+        """
+        self.write(new_params)
+        self.version += 1
+
+    def get_version(self):
+        return int(self.version.item())
+
+    def get_nn_parameters(self):
+        """
+        Return the global parameters as a state_dict of views of the store, to be copied by load_state_dict.
+        """
+        return {name: self.flat[start:end].view(shape) for name, start, end, shape in self.layout}
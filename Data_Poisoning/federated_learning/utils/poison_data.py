@@ -1,3 +1,4 @@
+import numpy
 from .label_replacement import apply_class_label_replacement
 from .client_utils import log_client_data_statistics
 
@@ -19,7 +20,7 @@ def poison_data(logger, distributed_dataset, num_workers, poisoned_worker_ids, r
     # TODO: Add support for multiple replacement methods?
     poisoned_dataset = []
 
-    class_labels = list(set(distributed_dataset[0][1]))
+    class_labels = numpy.unique(distributed_dataset[0][1]).tolist()
 
     logger.info("Poisoning data for workers: {}".format(str(poisoned_worker_ids)))
 
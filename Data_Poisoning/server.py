@@ -1,9 +1,8 @@
 from loguru import logger
 from federated_learning.arguments import Arguments
 from federated_learning.utils import generate_data_loaders_from_distributed_dataset
-from federated_learning.datasets.data_distribution import distribute_batches_equally
+from federated_learning.datasets import PartitionedDataset
 from federated_learning.utils import average_nn_parameters
-from federated_learning.utils import convert_distributed_data_into_numpy
 from federated_learning.utils import poison_data
 from federated_learning.utils import identify_random_elements
 from federated_learning.utils import save_results
@@ -11,9 +10,12 @@ from federated_learning.utils import load_train_data_loader
 from federated_learning.utils import load_test_data_loader
 from federated_learning.utils import generate_experiment_ids
 from federated_learning.utils import convert_results_to_csv
+from federated_learning.utils import create_client_executor
+from federated_learning.utils import GlobalParameterStore
 from client import Client
+from client import load_default_model
 
-def train_subset_of_clients(epoch, args, clients, poisoned_workers):
+def train_subset_of_clients(epoch, args, clients, poisoned_workers, executor):
     """
     Train a subset of clients per round.
 
@@ -25,6 +27,8 @@ def train_subset_of_clients(epoch, args, clients, poisoned_workers):
     :type clients: list(Client)
     :param poisoned_workers: indices of poisoned workers
     :type poisoned_workers: list(int)
+    :param executor: trains the selected clients
+    :type executor: SerialClientExecutor or ProcessClientExecutor
     """
     kwargs = args.get_round_worker_selection_strategy_kwargs()
     kwargs["current_epoch_number"] = epoch
@@ -34,27 +38,33 @@ def train_subset_of_clients(epoch, args, clients, poisoned_workers):
         poisoned_workers,
         kwargs)
 
-    for client_idx in random_workers:
-        args.get_logger().info("Training epoch #{} on client #{}", str(epoch), str(clients[client_idx].get_client_index()))
-        clients[client_idx].train(epoch)
+    parameters = executor.train_clients(epoch, random_workers)
 
     args.get_logger().info("Averaging client parameters")
-    parameters = [clients[client_idx].get_nn_parameters() for client_idx in random_workers]
     new_nn_params = average_nn_parameters(parameters)
 
-    for client in clients:
-        args.get_logger().info("Updating parameters on client #{}", str(client.get_client_index()))
-        client.update_nn_parameters(new_nn_params)
+    # the other clients pull the new version when they are selected or tested
+    parameter_store = clients[0].parameter_store
+    parameter_store.publish(new_nn_params)
+    args.get_logger().info("Published version #{} of the global parameters", str(parameter_store.get_version()))
+
+    for client_idx in random_workers:
+        clients[client_idx].release_nn()
 
     return clients[0].test(), random_workers
 
 def create_clients(args, train_data_loaders, test_data_loader):
     """
     Create a set of clients.
+
+    They share one store of the global parameters, starting from the default model,
+    and only build their NN while they are trained or tested.
     """
+    parameter_store = GlobalParameterStore(load_default_model(args).state_dict())
+
     clients = []
     for idx in range(args.get_num_workers()):
-        clients.append(Client(args, idx, train_data_loaders[idx], test_data_loader))
+        clients.append(Client(args, idx, train_data_loaders[idx], test_data_loader, parameter_store))
 
     return clients
 
@@ -64,11 +74,15 @@ def run_machine_learning(clients, args, poisoned_workers):
     """
     epoch_test_set_results = []
     worker_selection = []
-    for epoch in range(1, args.get_num_epochs() + 1):
-        results, workers_selected = train_subset_of_clients(epoch, args, clients, poisoned_workers)
+    executor = create_client_executor(args, clients)
+    try:
+        for epoch in range(1, args.get_num_epochs() + 1):
+            results, workers_selected = train_subset_of_clients(epoch, args, clients, poisoned_workers, executor)
 
-        epoch_test_set_results.append(results)
-        worker_selection.append(workers_selected)
+            epoch_test_set_results.append(results)
+            worker_selection.append(workers_selected)
+    finally:
+        executor.close()
 
     return convert_results_to_csv(epoch_test_set_results), worker_selection
 
@@ -88,9 +102,10 @@ def run_exp(replacement_method, num_poisoned_workers, KWARGS, client_selection_s
     train_data_loader = load_train_data_loader(logger, args)
     test_data_loader = load_test_data_loader(logger, args)
 
-    # Distribute batches equal volume IID
-    distributed_train_dataset = distribute_batches_equally(train_data_loader, args.get_num_workers())
-    distributed_train_dataset = convert_distributed_data_into_numpy(distributed_train_dataset)
+    # Distribute batches equal volume IID, the workers' data are views of one contiguous array
+    partitioned_train_dataset = PartitionedDataset.from_data_loader(train_data_loader, args.get_num_workers())
+    del train_data_loader
+    distributed_train_dataset = partitioned_train_dataset.get_distributed_dataset()
 
     poisoned_workers = identify_random_elements(args.get_num_workers(), args.get_num_poisoned_workers())
     distributed_train_dataset = poison_data(logger, distributed_train_dataset, args.get_num_workers(), poisoned_workers, replacement_method)
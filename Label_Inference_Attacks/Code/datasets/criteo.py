@@ -1,6 +1,9 @@
 """
 thanks: https://github.com/swapniel99/criteo/blob/master/criteo.py
 """
+import json
+import os
+
 import torch.utils.data as data
 from csv import DictReader
 import numpy as np
@@ -34,12 +37,23 @@ def get_csv_row_by_index(reader, index):
     return row
 
 
+def memmap_paths(processed_csv_file_path):
+    """
+    Paths of the binary features/labels written by datasets_preprocess/criteo_to_memmap.py for a criteo.csv.
+    """
+    stem = os.path.splitext(processed_csv_file_path)[0]
+    return stem + '_x.npy', stem + '_y.npy'
+
+
 class Criteo(data.Dataset):
 
-    def __init__(self, processed_csv_file_path, batch_size=BATCH_SIZE, train=True, total_samples_num=1e5, test_size=0.2):
+    def __init__(self, processed_csv_file_path, batch_size=BATCH_SIZE, train=True, total_samples_num=1e5, test_size=0.2,
+                 use_memmap=None):
         """
         Args:
             processed_csv_file_path (string): Path to the criteo.csv file.
+            use_memmap (bool): Read batches from the memory-mapped files written by criteo_to_memmap.py.
+                None to use them whenever they exist next to the csv file.
         """
         self.total_samples_num = total_samples_num
         self.test_size = test_size
@@ -51,9 +65,18 @@ class Criteo(data.Dataset):
         self.processed_csv_file_path = processed_csv_file_path
         self.batch_size = batch_size
 
-        df_labels = pd.read_csv(processed_csv_file_path, nrows=self.total_samples_num, usecols=['label'])
-        y_val = df_labels.astype('long')
-        self.labels = y_val.values.reshape(-1, batch_size)
+        x_path, y_path = memmap_paths(processed_csv_file_path)
+        if use_memmap is None:
+            use_memmap = os.path.exists(x_path) and os.path.exists(y_path)
+        self.use_memmap = use_memmap
+        if self.use_memmap:
+            self.features = np.load(x_path, mmap_mode='r')
+            y_val = np.load(y_path, mmap_mode='r')[:int(self.total_samples_num)]
+            self.labels = np.array(y_val).reshape(-1, batch_size)
+        else:
+            df_labels = pd.read_csv(processed_csv_file_path, nrows=self.total_samples_num, usecols=['label'])
+            y_val = df_labels.astype('long')
+            self.labels = y_val.values.reshape(-1, batch_size)
 
     def __len__(self):
         # print(f'The Criteo DATALOADER\'s batch quantity. Batch size is {self.batch_size}:')
@@ -69,6 +92,12 @@ class Criteo(data.Dataset):
         else:
             index = index + self.train_batches_num
 
+        if self.use_memmap:
+            start = index * self.batch_size
+            feat_ = torch.from_numpy(np.array(self.features[start:start + self.batch_size]))
+            label_ = torch.from_numpy(self.labels[index])
+            return feat_, label_
+
         temp_df = pd.read_csv(self.processed_csv_file_path, skiprows=index * self.batch_size, nrows=self.batch_size)
         temp_df = temp_df.drop(temp_df.columns[-1], axis=1)
         feature_names = temp_df.columns.tolist()
@@ -82,6 +111,74 @@ class Criteo(data.Dataset):
         return feat_, label_
 
 
+class CriteoSparse(data.Dataset):
+
+    def __init__(self, shard_dir, batch_size=BATCH_SIZE, train=True, total_samples_num=None, test_size=0.2,
+                 skip_samples=0):
+        """
+        Args:
+            shard_dir (string): Directory of the CSR shards written by datasets_preprocess/criteo_preprocess_sparse.py.
+            total_samples_num: Number of samples to use, None for all samples in the shards.
+            skip_samples (int): Number of samples at the start of the shards that are left out.
+        """
+        with open(os.path.join(shard_dir, 'meta.json')) as f:
+            meta = json.load(f)
+        self.D = meta['D']
+        self.shards = []
+        for shard_id in range(len(meta['shard_rows'])):
+            prefix = os.path.join(shard_dir, f"shard_{shard_id:05d}")
+            self.shards.append([np.load(prefix + suffix, mmap_mode='r')
+                                for suffix in ['.indptr.npy', '.indices.npy', '.data.npy', '.label.npy']])
+        self.shard_starts = np.concatenate([[0], np.cumsum(meta['shard_rows'])])
+
+        available_samples_num = self.shard_starts[-1] - skip_samples
+        if total_samples_num is None:
+            total_samples_num = available_samples_num
+        self.total_samples_num = min(total_samples_num, available_samples_num)
+        self.skip_samples = skip_samples
+        self.test_size = test_size
+        self.train_samples_num = int(self.total_samples_num * (1 - self.test_size))
+        self.test_samples_num = int(self.total_samples_num * self.test_size)
+        self.train_batches_num = int(self.train_samples_num / batch_size)
+        self.test_batches_num = int(self.test_samples_num / batch_size)
+        self.train = train
+        self.batch_size = batch_size
+
+    def __len__(self):
+        if self.train:
+            return self.train_batches_num
+        else:
+            return self.test_batches_num
+
+    def get_rows(self, start, end):
+        """
+        Densify samples [start, end), which may span several shards.
+        """
+        feat_ = np.zeros((end - start, self.D), dtype=np.float32)
+        label_ = np.empty(end - start, dtype=np.int64)
+        shard_id = np.searchsorted(self.shard_starts, start, side='right') - 1
+        row = start
+        while row < end:
+            indptr, indices, values, labels = self.shards[shard_id]
+            lo = row - self.shard_starts[shard_id]
+            hi = min(end, self.shard_starts[shard_id + 1]) - self.shard_starts[shard_id]
+            ptr = np.asarray(indptr[lo:hi + 1])
+            out_rows = np.repeat(np.arange(row - start, row - start + hi - lo), np.diff(ptr))
+            feat_[out_rows, indices[ptr[0]:ptr[-1]]] = values[ptr[0]:ptr[-1]]
+            label_[row - start:row - start + hi - lo] = labels[lo:hi]
+            row += hi - lo
+            shard_id += 1
+        return feat_, label_
+
+    def __getitem__(self, index):
+        # index is for batch
+        if not self.train:
+            index = index + self.train_batches_num
+        start = self.skip_samples + index * self.batch_size
+        feat_, label_ = self.get_rows(start, start + self.batch_size)
+        return torch.from_numpy(feat_), torch.from_numpy(label_)
+
+
 class CriteoSetup(DatasetSetup):
 
     def __init__(self):
@@ -90,10 +187,16 @@ class CriteoSetup(DatasetSetup):
         self.size_bottom_out = 4
 
     def set_datasets_for_ssl(self, file_path, n_labeled, party_num=None):
-        train_labeled_dataset = CriteoLabeled(file_path, n_labeled, train=True)
-        train_unlabeled_dataset = CriteoUnlabeled(file_path, n_labeled, train=True)
-        train_complete_dataset = Criteo(file_path, train=True)
-        test_dataset = Criteo(file_path, train=False)
+        if os.path.isdir(file_path):
+            train_labeled_dataset = CriteoSparseLabeled(file_path, n_labeled, train=True)
+            train_unlabeled_dataset = CriteoSparseUnlabeled(file_path, n_labeled, train=True)
+            train_complete_dataset = CriteoSparse(file_path, train=True)
+            test_dataset = CriteoSparse(file_path, train=False)
+        else:
+            train_labeled_dataset = CriteoLabeled(file_path, n_labeled, train=True)
+            train_unlabeled_dataset = CriteoUnlabeled(file_path, n_labeled, train=True)
+            train_complete_dataset = Criteo(file_path, train=True)
+            test_dataset = Criteo(file_path, train=False)
         print("#Labeled:", len(train_labeled_dataset),
               "#Unlabeled:", len(train_unlabeled_dataset))
         return train_labeled_dataset, train_unlabeled_dataset, test_dataset, train_complete_dataset
@@ -105,6 +208,8 @@ class CriteoSetup(DatasetSetup):
         return transforms_
 
     def get_transformed_dataset(self, file_path, party_num=None, train=True):
+        if os.path.isdir(file_path):
+            return CriteoSparse(file_path, batch_size=BATCH_SIZE, train=train)
         _dataset = Criteo(file_path, batch_size=BATCH_SIZE, train=train)
         return _dataset
 
@@ -131,6 +236,21 @@ class CriteoUnlabeled(Criteo):
         return feat_, label_
 
 
+class CriteoSparseLabeled(CriteoSparse):
+
+    def __init__(self, shard_dir, n_labeled, train=True):
+        super(CriteoSparseLabeled, self).__init__(shard_dir, batch_size=100, train=train, total_samples_num=n_labeled, test_size=0.)
+
+
+class CriteoSparseUnlabeled(CriteoSparse):
+
+    def __init__(self, shard_dir, n_labeled, train=True):
+        # the samples following the n_labeled labeled ones
+        super(CriteoSparseUnlabeled, self).__init__(shard_dir, batch_size=100, train=train, total_samples_num=1e6 - n_labeled,
+                                                    test_size=0., skip_samples=n_labeled)
+        self.n_labeled = n_labeled
+
+
 if __name__ == "__main__":
 
     path = 'D:/Datasets/Criteo/criteo.csv'
@@ -0,0 +1,132 @@
+"""
+Chunked, multi-process version of criteo_preprocess.py that writes sparse CSR shards instead of a dense csv.
+
+Each shard i is stored as four .npy files in the output directory:
+shard_{i}.indptr.npy, shard_{i}.indices.npy, shard_{i}.data.npy and shard_{i}.label.npy,
+and meta.json records D and the number of rows in every shard. Load them with datasets.criteo.CriteoSparse.
+
+Samples are selected exactly as in criteo_preprocess.py (a row is kept when its label differs from the label of the
+previously kept row). Features are hashed with crc32 instead of the built-in hash(), which is salted per process
+and would give different features in every worker.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import zlib
+from collections import deque
+
+import numpy as np
+
+D_ = 2 ** 13  # number of weights use for learning
+header = ['Label', 'i1', 'i2', 'i3', 'i4', 'i5', 'i6', 'i7', 'i8', 'i9', 'i10', 'i11', 'i12', 'i13', 'c1', 'c2', 'c3',
+          'c4', 'c5', 'c6', 'c7', 'c8', 'c9', 'c10', 'c11', 'c12', 'c13', 'c14', 'c15', 'c16', 'c17', 'c18', 'c19',
+          'c20', 'c21', 'c22', 'c23', 'c24', 'c25', 'c26']
+
+
+def shard_prefix(output_dir, shard_id):
+    return os.path.join(output_dir, f"shard_{shard_id:05d}")
+
+
+def hash_fields(lines, D):
+    """
+    :return: the hashed 'key=value' index of every field, shape (len(lines), len(header) - 1)
+    """
+    n_fields = len(header) - 1
+    hashed = np.empty((len(lines), n_fields), dtype=np.int64)
+    for r, line in enumerate(lines):
+        values = line.rstrip('\n').split('\t')[1:]
+        values += [''] * (n_fields - len(values))
+        for k in range(n_fields):
+            hashed[r, k] = zlib.crc32(f"{header[k + 1]}={values[k]}".encode()) % D
+    return hashed
+
+
+def get_csr(lines, D):
+    """
+    Sparse equivalent of get_x in criteo_preprocess.py for a chunk of raw lines:
+    hashed features plus pairwise-XOR crosses, counted per row.
+    """
+    hashed = hash_fields(lines, D)
+    i, j = np.triu_indices(hashed.shape[1], 1)
+    full = np.sort(np.concatenate([hashed, hashed[:, i] ^ hashed[:, j]], axis=1), axis=1)
+    is_new = np.ones(full.shape, dtype=bool)
+    is_new[:, 1:] = full[:, 1:] != full[:, :-1]
+    indices = full[is_new].astype(np.int32)
+    starts = np.flatnonzero(is_new.ravel())
+    data = np.diff(np.append(starts, full.size)).astype(np.float32)
+    indptr = np.zeros(len(lines) + 1, dtype=np.int64)
+    np.cumsum(is_new.sum(axis=1), out=indptr[1:])
+    return indptr, indices, data
+
+
+def write_shard(args):
+    output_dir, shard_id, lines, labels, D = args
+    indptr, indices, data = get_csr(lines, D)
+    prefix = shard_prefix(output_dir, shard_id)
+    np.save(prefix + '.indptr.npy', indptr)
+    np.save(prefix + '.indices.npy', indices)
+    np.save(prefix + '.data.npy', data)
+    np.save(prefix + '.label.npy', np.asarray(labels, dtype=np.int64))
+    return len(lines)
+
+
+def select_samples(train_txt_file_path, max_samples):
+    """
+    Stream (line, label) of the kept samples, alternating labels as in criteo_preprocess.py.
+    """
+    count = 0
+    pre_label = 1
+    with open(train_txt_file_path) as f:
+        for line in f:
+            y = 1 if line.startswith('1\t') else 0
+            if y != pre_label:
+                pre_label = y
+                count += 1
+                yield line, y
+                if max_samples and count == max_samples:
+                    break
+
+
+def chunked(samples, chunk_rows):
+    lines, labels = [], []
+    for line, y in samples:
+        lines.append(line)
+        labels.append(y)
+        if len(lines) == chunk_rows:
+            yield lines, labels
+            lines, labels = [], []
+    if lines:
+        yield lines, labels
+
+
+def preprocess(train_txt_file_path, output_dir, D=D_, max_samples=0, chunk_rows=10000, n_jobs=None):
+    os.makedirs(output_dir, exist_ok=True)
+    n_jobs = n_jobs or os.cpu_count()
+    shard_rows = []
+    with multiprocessing.Pool(n_jobs) as pool:
+        # at most 2 chunks per worker are in flight, so memory stays bounded by the chunk size
+        pending = deque()
+        for shard_id, (lines, labels) in enumerate(chunked(select_samples(train_txt_file_path, max_samples),
+                                                           chunk_rows)):
+            if len(pending) >= 2 * n_jobs:
+                shard_rows.append(pending.popleft().get())
+            pending.append(pool.apply_async(write_shard, ((output_dir, shard_id, lines, labels, D),)))
+            if max_samples and shard_id % 10 == 0:
+                print(f"{100 * shard_id * chunk_rows / max_samples:.2f}% submitted...")
+        while pending:
+            shard_rows.append(pending.popleft().get())
+    with open(os.path.join(output_dir, 'meta.json'), 'w') as f:
+        json.dump({'D': D, 'shard_rows': shard_rows}, f)
+    print(f"{sum(shard_rows)} samples written to {len(shard_rows)} shards.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Hash the raw Criteo train.txt into sparse CSR shards')
+    parser.add_argument('--train-txt', type=str, default='Path to Criteo/train.txt')
+    parser.add_argument('--output-dir', type=str, default='Path to Criteo/criteo_sparse')
+    parser.add_argument('--max-samples', type=int, default=0, help='0 to process the whole file')
+    parser.add_argument('--chunk-rows', type=int, default=10000)
+    parser.add_argument('--n-jobs', type=int, default=None)
+    args = parser.parse_args()
+    preprocess(args.train_txt, args.output_dir, D_, args.max_samples, args.chunk_rows, args.n_jobs)
@@ -0,0 +1,49 @@
+"""
+Convert the criteo.csv written by criteo_preprocess.py into a fixed-width binary layout:
+<name>_x.npy holds the hashed features (n_samples x D) and <name>_y.npy the labels.
+Both are .npy files, so they can be opened with np.load(..., mmap_mode='r') and any batch is an O(1) slice.
+"""
+import argparse
+import os
+os.sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from datasets.criteo import memmap_paths
+
+
+def count_csv_rows(csv_file_path):
+    rows = 0
+    with open(csv_file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 24), b''):
+            rows += block.count(b'\n')
+    return rows - 1  # header
+
+
+def convert_csv_to_memmap(csv_file_path, chunk_rows=1000, dtype=np.float32):
+    x_path, y_path = memmap_paths(csv_file_path)
+    n_samples = count_csv_rows(csv_file_path)
+    n_features = len(pd.read_csv(csv_file_path, nrows=0).columns) - 1  # the last column is the label
+
+    x = np.lib.format.open_memmap(x_path, mode='w+', dtype=dtype, shape=(n_samples, n_features))
+    y = np.lib.format.open_memmap(y_path, mode='w+', dtype=np.int64, shape=(n_samples,))
+    start = 0
+    for chunk in pd.read_csv(csv_file_path, chunksize=chunk_rows, dtype=dtype):
+        values = chunk.values
+        end = start + len(values)
+        x[start:end] = values[:, :-1]
+        y[start:end] = values[:, -1]
+        start = end
+        print(f"{100 * end / n_samples:.2f}% completed...")
+    x.flush()
+    y.flush()
+    return x_path, y_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Convert criteo.csv to memory-mapped .npy files')
+    parser.add_argument('--csv-path', type=str, default='Path to Criteo/criteo.csv')
+    parser.add_argument('--chunk-rows', type=int, default=1000)
+    args = parser.parse_args()
+    print(convert_csv_to_memmap(args.csv_path, args.chunk_rows))
@@ -0,0 +1,31 @@
+"""
+Compare the time of one pass over the Criteo training batches when reading from criteo.csv
+and from the memory-mapped files written by datasets_preprocess/criteo_to_memmap.py.
+"""
+import argparse
+import os
+import time
+os.sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datasets.criteo import Criteo
+
+parser = argparse.ArgumentParser(description='Criteo epoch time benchmark')
+parser.add_argument('--path-dataset', type=str, default='D:/Datasets/Criteo/criteo.csv')
+parser.add_argument('--batch-size', type=int, default=1000)
+parser.add_argument('--max-batches', type=int, default=0,
+                    help='number of batches to read per pass, 0 for the whole training split')
+args = parser.parse_args()
+
+
+def time_epoch(use_memmap):
+    dataset = Criteo(args.path_dataset, batch_size=args.batch_size, train=True, use_memmap=use_memmap)
+    n_batches = len(dataset) if args.max_batches <= 0 else min(args.max_batches, len(dataset))
+    start = time.perf_counter()
+    for index in range(n_batches):
+        feat, label = dataset[index]
+    return n_batches, time.perf_counter() - start
+
+
+for name, use_memmap in [('csv', False), ('memmap', True)]:
+    n_batches, elapsed = time_epoch(use_memmap)
+    print(f"{name}: {n_batches} batches in {elapsed:.2f}s ({elapsed / n_batches * 1000:.1f} ms/batch)")
@@ -0,0 +1,84 @@
+"""
+Check that the whole-tensor defenses in possible_defenses.py match the distribution of the element-wise
+implementations (two-sample Kolmogorov-Smirnov tests), and time both per batch.
+"""
+import argparse
+import os
+import time
+os.sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+from scipy.stats import ks_2samp
+
+import possible_defenses
+
+parser = argparse.ArgumentParser(description='possible_defenses equivalence test and microbenchmark')
+parser.add_argument('--batch-size', type=int, default=1000)
+parser.add_argument('--size-bottom-out', type=int, default=4)
+parser.add_argument('--theta-u', type=float, default=0.1,
+                    help='fraction of gradients kept by dp_gc_ppdl, below 1 so that the rest is zeroed')
+parser.add_argument('--noise-scale', type=float, default=1e-4)
+parser.add_argument('--trials', type=int, default=200, help='number of batches drawn for the KS tests')
+parser.add_argument('--alpha', type=float, default=1e-3, help='significance level of the KS tests')
+args = parser.parse_args()
+
+ppdl_kwargs = dict(epsilon=1.8, sensitivity=1, theta_u=args.theta_u, gamma=0.001, tau=0.0001)
+
+
+def laplace_mech_elementwise(dp, tensor):
+    noisy_mask = torch.zeros(tensor.shape).flatten()
+    for i in range(noisy_mask.shape[0]):
+        noisy_mask[i] = dp.noisy_count()
+    return tensor + noisy_mask.reshape(tensor.shape)
+
+
+def run_ppdl(func, grad):
+    grad = grad.clone()
+    func(layer_grad_list=[grad], **ppdl_kwargs)
+    return grad
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def check(name, samples_a, samples_b):
+    statistic, p_value = ks_2samp(samples_a.numpy(), samples_b.numpy())
+    print(f"{name}: KS statistic {statistic:.4f}, p-value {p_value:.4f}")
+    assert p_value > args.alpha, f"{name} distributions differ"
+
+
+grad = torch.randn(args.batch_size, args.size_bottom_out) * 1e-3
+dp = possible_defenses.DPLaplacianNoiseApplyer(beta=args.noise_scale)
+
+# the PPDL trials use a smaller batch, the element-wise reference is quadratic in the number of gradients
+small_grad = grad[:max(1, args.batch_size // 10)]
+ppdl_ref = torch.stack([run_ppdl(possible_defenses.dp_gc_ppdl_elementwise, small_grad).flatten()
+                        for _ in range(args.trials)])
+ppdl_vec = torch.stack([run_ppdl(possible_defenses.dp_gc_ppdl, small_grad).flatten() for _ in range(args.trials)])
+check('dp_gc_ppdl values', ppdl_ref.flatten(), ppdl_vec.flatten())
+# trials that selected c gradients and zeroed the rest; the few that run out of gradients first keep them all
+c = int(args.theta_u * small_grad.numel())
+budget_ref = ppdl_ref[(ppdl_ref != 0).sum(1) <= c]
+budget_vec = ppdl_vec[(ppdl_vec != 0).sum(1) <= c]
+assert len(budget_ref) > 0 and len(budget_vec) > 0, "dp_gc_ppdl never reached its budget, lower --theta-u"
+check('dp_gc_ppdl selected values', budget_ref[budget_ref != 0], budget_vec[budget_vec != 0])
+print(f"dp_gc_ppdl kept: elementwise {float((ppdl_ref != 0).float().mean()):.4f}, "
+      f"vectorized {float((ppdl_vec != 0).float().mean()):.4f}, "
+      f"budget reached in {len(budget_ref)} and {len(budget_vec)} of {args.trials} trials")
+
+lap_ref = torch.cat([(laplace_mech_elementwise(dp, grad) - grad).flatten() for _ in range(10)])
+lap_vec = torch.cat([(dp.laplace_mech(grad) - grad).flatten() for _ in range(10)])
+check('laplace_mech noise', lap_ref, lap_vec)
+
+t_ref = timed(lambda: run_ppdl(possible_defenses.dp_gc_ppdl_elementwise, grad), 1)
+t_vec = timed(lambda: run_ppdl(possible_defenses.dp_gc_ppdl, grad), 10)
+print(f"dp_gc_ppdl per batch: elementwise {t_ref * 1000:.1f} ms, vectorized {t_vec * 1000:.2f} ms, "
+      f"speedup {t_ref / t_vec:.1f}x")
+t_ref = timed(lambda: laplace_mech_elementwise(dp, grad), 1)
+t_vec = timed(lambda: dp.laplace_mech(grad), 100)
+print(f"laplace_mech per batch: elementwise {t_ref * 1000:.1f} ms, vectorized {t_vec * 1000:.3f} ms, "
+      f"speedup {t_ref / t_vec:.1f}x")
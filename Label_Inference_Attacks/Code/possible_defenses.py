@@ -25,6 +25,13 @@ def generate_lap_noise(beta):
     return n_value
 
 
+def generate_lap_noise_tensor(shape, beta, device=None):
+    # element-wise equivalent of generate_lap_noise, drawn in one call
+    u1 = torch.rand(shape, device=device)
+    u2 = torch.rand(shape, device=device)
+    return torch.where(u1 <= 0.5, -beta * torch.log1p(-u2), beta * torch.log(u2))
+
+
 def sigma(x, c, sensitivity):
     x = 2. * c * sensitivity / x
     return x
@@ -78,7 +85,8 @@ def set_one_grad_by_grad_id(layer_grad_list, num_grad_per_layer, id, set_value):
             id_in_this_layer % grad_this_layer.shape[1]] = set_value
 
 
-def dp_gc_ppdl(epsilon, sensitivity, layer_grad_list, theta_u, gamma, tau):
+def dp_gc_ppdl_elementwise(epsilon, sensitivity, layer_grad_list, theta_u, gamma, tau):
+    # reference implementation, kept to check dp_gc_ppdl against
     grad_num, num_grad_per_layer = get_grad_num(layer_grad_list)
     c = int(theta_u * grad_num)
     # print("c:", c)
@@ -117,6 +125,49 @@ def dp_gc_ppdl(epsilon, sensitivity, layer_grad_list, theta_u, gamma, tau):
                     break
 
 
+def dp_gc_ppdl(epsilon, sensitivity, layer_grad_list, theta_u, gamma, tau):
+    """
+    Whole-tensor version of dp_gc_ppdl_elementwise with the same output distribution.
+    Gradients are visited in a random permutation; a gradient is selected when
+    |bound(grad)| + Lap(2 * sigma1) >= tau + r_tau, and r_tau ~ Lap(sigma1) is redrawn after every selection.
+    Once c gradients are selected, they are replaced by bound(grad + Lap(sigma2)) and all others are set to 0.
+    """
+    flat = torch.cat([grad_tensor.reshape(-1) for grad_tensor in layer_grad_list])
+    grad_num = flat.shape[0]
+    c = int(theta_u * grad_num)
+    epsilon1 = 8. / 9 * epsilon
+    epsilon2 = 2. / 9 * epsilon
+    sigma1 = sigma(epsilon1, c, sensitivity)
+
+    perm = torch.randperm(grad_num, device=flat.device)
+    score = torch.abs(torch.clamp(flat[perm], -gamma, gamma)) \
+        + generate_lap_noise_tensor(grad_num, 2 * sigma1, flat.device) - tau
+    score = score.cpu()
+    # the threshold of each selection only depends on where the previous one stopped, so this scan stays sequential
+    r_taus = generate_lap_noise_tensor(max(c, 1), sigma1)
+    selected = []
+    pos = 0
+    block = 256
+    while len(selected) < max(c, 1) and pos < grad_num:
+        hits = torch.nonzero(score[pos:pos + block] >= r_taus[len(selected)])
+        if len(hits) == 0:
+            pos += block
+            continue
+        pos += int(hits[0]) + 1
+        selected.append(pos - 1)
+
+    selected_ids = perm[torch.tensor(selected, dtype=torch.long, device=flat.device)]
+    noisy = flat[selected_ids] + generate_lap_noise_tensor(len(selected), sigma(epsilon2, c, sensitivity), flat.device)
+    # if the gradients run out before c are selected, the unselected ones are left unchanged
+    result = torch.zeros_like(flat) if len(selected) >= max(c, 1) else flat.clone()
+    result[selected_ids] = torch.clamp(noisy, -gamma, gamma).to(flat.dtype)
+
+    start = 0
+    for grad_tensor in layer_grad_list:
+        grad_tensor.copy_(result[start:start + grad_tensor.numel()].reshape(grad_tensor.shape))
+        start += grad_tensor.numel()
+
+
 # Multistep gradient
 def multistep_gradient(tensor, bound_abs, bins_num=12):
     # Criteo 1e-3
@@ -171,15 +222,7 @@ class DPLaplacianNoiseApplyer():
         return n_value
 
     def laplace_mech(self, tensor):
-        # generate noisy mask
-        # whether the tensor to process is on cuda devices
-        noisy_mask = torch.zeros(tensor.shape).to(torch.float)
-        if 'cuda' in str(tensor.device):
-            noisy_mask = noisy_mask.cuda()
-        noisy_mask = noisy_mask.flatten()
-        for i in range(noisy_mask.shape[0]):
-            noisy_mask[i] = self.noisy_count()
-        noisy_mask = noisy_mask.reshape(tensor.shape)
-        # print("noisy_tensor:", noisy_mask)
+        # generate noisy mask on the device of the tensor, one noisy_count() per element
+        noisy_mask = generate_lap_noise_tensor(tensor.shape, self.beta, tensor.device)
         tensor = tensor + noisy_mask
         return tensor